@@ -0,0 +1,163 @@
+import os
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("benchmarks")
+
+# Cada dependência usa o serviço real quando a URL correspondente está
+# definida e, caso contrário, um substituto em processo:
+#   BENCH_MONGO_URI     -> mongod (banco BENCH_MONGO_DB, apagado no início)
+#   BENCH_REDIS_URL     -> redis-server (banco inteiro é limpo no início)
+#   BENCH_RABBITMQ_URL  -> RabbitMQ; sem ela, o TestRabbitBroker do FastStream
+BENCH_MONGO_URI = os.getenv("BENCH_MONGO_URI")
+BENCH_MONGO_DB = os.getenv("BENCH_MONGO_DB", "transflow_bench")
+BENCH_REDIS_URL = os.getenv("BENCH_REDIS_URL")
+BENCH_RABBITMQ_URL = os.getenv("BENCH_RABBITMQ_URL")
+
+@dataclass
+class Ambiente:
+    mongo: Any
+    redis_bytes: Any
+    redis_texto: Any
+    broker: Any
+    descricao: dict
+    main: Any = None
+    consumer: Any = None
+    producer: Any = None
+    _contexto_broker: Optional[Any] = field(default=None, repr=False)
+
+def _configurar_variaveis():
+    # Os módulos da aplicação leem a configuração na importação, então as
+    # variáveis precisam estar definidas antes de importar src.*.
+    os.environ["MONGO_DB"] = BENCH_MONGO_DB
+
+    if BENCH_REDIS_URL:
+        url = urlsplit(BENCH_REDIS_URL)
+        os.environ["REDIS_HOST"] = url.hostname or "localhost"
+        os.environ["REDIS_PORT"] = str(url.port or 6379)
+        os.environ["REDIS_URL"] = BENCH_REDIS_URL
+
+    if BENCH_RABBITMQ_URL:
+        url = urlsplit(BENCH_RABBITMQ_URL)
+        os.environ["RABBITMQ_HOST"] = url.hostname or "localhost"
+        os.environ["RABBITMQ_PORT"] = str(url.port or 5672)
+        os.environ["RABBITMQ_USER"] = url.username or "guest"
+        os.environ["RABBITMQ_PASSWORD"] = url.password or "guest"
+
+async def _conectar_redis():
+    if BENCH_REDIS_URL:
+        import redis.asyncio as aioredis
+
+        redis_bytes = aioredis.from_url(BENCH_REDIS_URL)
+        redis_texto = aioredis.from_url(BENCH_REDIS_URL, decode_responses=True)
+        await redis_bytes.flushdb()
+        return redis_bytes, redis_texto, BENCH_REDIS_URL
+
+    import fakeredis
+
+    servidor = fakeredis.FakeServer()
+    redis_bytes = fakeredis.aioredis.FakeRedis(server=servidor)
+    redis_texto = fakeredis.aioredis.FakeRedis(server=servidor, decode_responses=True)
+    return redis_bytes, redis_texto, "fakeredis"
+
+async def _conectar_mongo():
+    if BENCH_MONGO_URI:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        cliente = AsyncIOMotorClient(BENCH_MONGO_URI)
+        await cliente.drop_database(BENCH_MONGO_DB)
+        return cliente, BENCH_MONGO_URI
+
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient(), "mongomock"
+
+async def montar_ambiente(preparar_consumer: Optional[Callable[[Any], None]] = None) -> Ambiente:
+    # preparar_consumer recebe o módulo src.consumer antes de configurar(),
+    # que é quando o agrupador do modo em lote captura _processar_lote.
+    _configurar_variaveis()
+
+    # Nenhum módulo conecta na importação; os clientes da API são
+    # substituídos abaixo antes do primeiro uso.
+    import src.main as main
+    import src.consumer as consumer
+    from src.database.redis_client import usar_async_redis_client
+    from src.database.mongo_client import mongo_client
+    from src.database.indices import criar_indices, criar_indices_corridas
+    from src.database import rollups
+    from src.producer import producer
+
+    redis_bytes, redis_texto, descricao_redis = await _conectar_redis()
+    cliente_mongo, descricao_mongo = await _conectar_mongo()
+
+    # A API usa os singletons dos módulos de banco; o consumer recebe os
+    # mesmos bancos por configurar().
+    usar_async_redis_client(redis_bytes)
+    mongo_client.usar(cliente_mongo, BENCH_MONGO_DB)
+
+    await criar_indices_corridas(mongo_client.get_collection("corridas"))
+    await criar_indices(
+        mongo_client.get_collection(rollups.COLECAO_ROLLUPS), rollups.INDICES_ROLLUPS
+    )
+    if preparar_consumer is not None:
+        preparar_consumer(consumer)
+    await consumer.configurar(cliente_mongo, redis_texto)
+
+    contexto = None
+    if BENCH_RABBITMQ_URL:
+        await consumer.broker.start()
+        await producer.connect()
+        broker = consumer.broker
+        descricao_rabbit = BENCH_RABBITMQ_URL
+    else:
+        from faststream.rabbit import TestRabbitBroker
+
+        # Em memória a publicação chama o handler do consumer diretamente:
+        # o POST só retorna depois que a corrida foi gravada.
+        contexto = TestRabbitBroker(consumer.broker)
+        broker = await contexto.__aenter__()
+        producer.broker = broker
+        descricao_rabbit = "TestRabbitBroker"
+
+        if producer.batch_size > 1:
+            logger.warning("PRODUCER_BATCH_SIZE é ignorado com o TestRabbitBroker")
+
+    outbox = main.get_outbox()
+    if outbox is not None:
+        await outbox.iniciar()
+
+    return Ambiente(
+        mongo=cliente_mongo,
+        redis_bytes=redis_bytes,
+        redis_texto=redis_texto,
+        broker=broker,
+        descricao={
+            "mongo": descricao_mongo,
+            "redis": descricao_redis,
+            "rabbitmq": descricao_rabbit,
+        },
+        main=main,
+        consumer=consumer,
+        producer=producer,
+        _contexto_broker=contexto,
+    )
+
+async def encerrar_ambiente(ambiente: Ambiente):
+    outbox = ambiente.main.get_outbox()
+    if outbox is not None:
+        await outbox.parar()
+
+    if ambiente._contexto_broker is not None:
+        # O broker de teste pertence ao consumer; o producer só solta a
+        # referência antes de encerrar o próprio agrupador.
+        ambiente.producer.broker = None
+        await ambiente.producer.close()
+        await ambiente._contexto_broker.__aexit__(None, None, None)
+    else:
+        await ambiente.producer.close()
+        await ambiente.broker.close()
+
+    await ambiente.consumer.on_shutdown()
+    await ambiente.redis_bytes.close()
@@ -0,0 +1,111 @@
+import time
+import random
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List
+
+FORMAS_PAGAMENTO = ("pix", "cartao", "dinheiro", "DigitalCoin")
+BAIRROS = ("Centro", "Inoã", "Itaipuaçu", "Icaraí", "Barra", "Flamengo", "Méier", "Niterói")
+
+def nomes_motoristas(quantidade: int) -> List[str]:
+    return [f"Motorista {indice:05d}" for indice in range(quantidade)]
+
+def gerar_corrida(rng: random.Random, motoristas: List[str]) -> dict:
+    # Poucos motoristas concentram a maior parte das corridas, como na
+    # operação real; isso exercita as faixas por motorista do consumer.
+    motorista = motoristas[min(int(rng.paretovariate(1.2)) - 1, len(motoristas) - 1)]
+    origem, destino = rng.sample(BAIRROS, 2)
+    return {
+        "passageiro": {
+            "nome": f"Passageiro {rng.randrange(100000):05d}",
+            "telefone": f"9{rng.randrange(10000):04d}-{rng.randrange(10000):04d}"
+        },
+        "motorista": {"nome": motorista, "nota": round(rng.uniform(3.5, 5.0), 1)},
+        "origem": origem,
+        "destino": destino,
+        "valor_corrida": round(rng.uniform(8, 150), 2),
+        "forma_pagamento": rng.choice(FORMAS_PAGAMENTO),
+    }
+
+def gerar_documentos(
+    rng: random.Random, motoristas: List[str], quantidade: int, inicio: int = 0
+) -> List[dict]:
+    # Documentos já no formato gravado pelo consumer, com datas espalhadas
+    # pelos últimos 30 dias, para popular a coleção direto no MongoDB.
+    agora = datetime.utcnow()
+    documentos = []
+    for indice in range(inicio, inicio + quantidade):
+        corrida = gerar_corrida(rng, motoristas)
+        corrida["id_corrida"] = f"b{indice:09d}"
+        corrida["data_criacao"] = agora - timedelta(seconds=rng.randrange(30 * 24 * 3600))
+        documentos.append(corrida)
+    return documentos
+
+def percentis(valores: List[float]) -> dict:
+    # Valores em segundos; o resumo sai em milissegundos.
+    if not valores:
+        return {"n": 0}
+
+    ordenados = sorted(valores)
+    n = len(ordenados)
+
+    def rank(p: float) -> float:
+        return ordenados[min(n - 1, max(0, int(round(p * n + 0.5)) - 1))]
+
+    return {
+        "n": n,
+        "media_ms": round(1000 * sum(ordenados) / n, 3),
+        "p50_ms": round(1000 * rank(0.50), 3),
+        "p90_ms": round(1000 * rank(0.90), 3),
+        "p99_ms": round(1000 * rank(0.99), 3),
+        "p999_ms": round(1000 * rank(0.999), 3),
+        "max_ms": round(1000 * ordenados[-1], 3),
+    }
+
+async def carga_aberta(
+    taxa: float,
+    duracao: float,
+    operacao: Callable[[int], Awaitable[None]],
+    max_em_voo: int = 10000
+) -> dict:
+    # Gerador em malha aberta: as requisições saem no horário agendado,
+    # independentemente das respostas anteriores, e a latência é medida a
+    # partir desse horário. Assim o atraso de um servidor lento aparece nos
+    # percentis em vez de simplesmente reduzir a taxa enviada.
+    intervalo = 1 / taxa
+    total = max(1, int(taxa * duracao))
+    latencias: List[float] = []
+    erros: List[str] = []
+    em_voo = asyncio.Semaphore(max_em_voo)
+
+    async def medir(indice: int, agendado: float):
+        try:
+            await operacao(indice)
+            latencias.append(time.perf_counter() - agendado)
+        except Exception as e:
+            erros.append(f"{type(e).__name__}: {e}")
+        finally:
+            em_voo.release()
+
+    tarefas = []
+    inicio = time.perf_counter()
+    for indice in range(total):
+        agendado = inicio + indice * intervalo
+        espera = agendado - time.perf_counter()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        await em_voo.acquire()
+        tarefas.append(asyncio.create_task(medir(indice, agendado)))
+
+    await asyncio.gather(*tarefas)
+    decorrido = time.perf_counter() - inicio
+
+    return {
+        "enviadas": total,
+        "erros": len(erros),
+        "exemplos_erros": sorted(set(erros))[:5],
+        "duracao_s": round(decorrido, 3),
+        "taxa_alvo_por_segundo": taxa,
+        "taxa_obtida_por_segundo": round(len(latencias) / decorrido, 2),
+        "latencia": percentis(latencias),
+    }
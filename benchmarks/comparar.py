@@ -0,0 +1,66 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Métricas em que um valor maior é melhor; nas demais (latências, tempos)
+# um valor maior é regressão.
+SUFIXOS_MAIOR_MELHOR = ("por_segundo", "gravadas")
+# Parâmetros e contagens que não medem desempenho.
+SUFIXOS_IGNORADOS = (
+    ".n", "enviadas", "mensagens", "limite", "paginas",
+    "concorrencia_publicacao", "taxa_alvo_por_segundo",
+)
+
+def _achatar(valor, prefixo: str = "") -> dict:
+    if isinstance(valor, dict):
+        achatado = {}
+        for chave, item in valor.items():
+            achatado.update(_achatar(item, f"{prefixo}.{chave}" if prefixo else chave))
+        return achatado
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return {prefixo: float(valor)}
+    return {}
+
+def comparar(base: dict, novo: dict, limite: float) -> list:
+    metricas_base = _achatar(base["cenarios"])
+    metricas_novo = _achatar(novo["cenarios"])
+    linhas = []
+
+    for metrica in sorted(metricas_base.keys() & metricas_novo.keys()):
+        antes, depois = metricas_base[metrica], metricas_novo[metrica]
+        if antes == 0 or metrica.endswith(SUFIXOS_IGNORADOS):
+            continue
+        variacao = (depois - antes) / antes
+        maior_melhor = metrica.endswith(SUFIXOS_MAIOR_MELHOR)
+        regressao = (-variacao if maior_melhor else variacao) > limite
+        linhas.append((metrica, antes, depois, variacao, regressao))
+
+    return linhas
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("novo", type=Path)
+    parser.add_argument("--limite", type=float, default=0.10,
+                        help="Variação relativa que conta como regressão (padrão 0.10)")
+    parser.add_argument("--falhar", action="store_true",
+                        help="Sai com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    novo = json.loads(args.novo.read_text(encoding="utf-8"))
+    print(f"base: {base.get('commit', '')[:8]}  novo: {novo.get('commit', '')[:8]}")
+
+    linhas = comparar(base, novo, args.limite)
+    for metrica, antes, depois, variacao, regressao in linhas:
+        marca = "!" if regressao else " "
+        print(f"{marca} {metrica:<70} {antes:>12.3f} {depois:>12.3f} {variacao:>+8.1%}")
+
+    regressoes = sum(1 for *_, regressao in linhas if regressao)
+    print(f"{regressoes} regressões acima de {args.limite:.0%}")
+    if args.falhar and regressoes:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
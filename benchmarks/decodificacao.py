@@ -0,0 +1,111 @@
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+from dateutil import parser as date_parser
+from pydantic import TypeAdapter
+
+from benchmarks.carga import gerar_documentos, nomes_motoristas
+from benchmarks.registro import DIRETORIO_RESULTADOS, gravar, metadados
+from src.models.corrida_mensagem import decodificar_corrida, decodificar_lote
+from src.models.corrida_model import Corrida
+from src.producer import serializar_corrida
+
+# Custo por mensagem da decodificação no consumer:
+#   anterior         - json.loads do FastStream, checagem manual dos campos e
+#                      dateutil.isoparse de data_criacao (sem validar Corrida)
+#   anterior_modelo  - validate_json para o modelo Corrida seguido de model_dump
+#   validate_json    - caminho atual: validate_json nos bytes para CorridaMensagem
+# e o mesmo para mensagens em lote de POST /corridas/batch.
+#
+#   python -m benchmarks.decodificacao [--mensagens 20000] [--tamanho-lote 500]
+
+def _anterior(corpo: bytes) -> dict:
+    corrida = json.loads(corpo)
+    if not isinstance(corrida, dict):
+        raise ValueError("esperado um objeto")
+    if not corrida.get("id_corrida") or not (corrida.get("motorista") or {}).get("nome"):
+        raise ValueError("mensagem incompleta")
+    corrida["valor_corrida"] = float(corrida["valor_corrida"])
+    valor = corrida.get("data_criacao")
+    corrida["data_criacao"] = date_parser.isoparse(str(valor)) if valor else datetime.utcnow()
+    return corrida
+
+corrida_modelo_adapter = TypeAdapter(Corrida)
+
+def _anterior_modelo(corpo: bytes) -> dict:
+    return corrida_modelo_adapter.validate_json(corpo).model_dump()
+
+def _anterior_lote(corpo: bytes) -> list:
+    corridas = json.loads(corpo)
+    return [_anterior(json.dumps(corrida).encode()) for corrida in corridas]
+
+def medir(funcao, mensagens: list, repeticoes: int, corridas_por_mensagem: int = 1) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for mensagem in mensagens:
+            funcao(mensagem)
+        tempos.append(time.perf_counter() - inicio)
+    total = statistics.median(tempos)
+    return {
+        "total_ms": round(1000 * total, 3),
+        "por_corrida_us": round(1e6 * total / (len(mensagens) * corridas_por_mensagem), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da decodificação de mensagens no consumer")
+    parser.add_argument("--mensagens", type=int, default=20000)
+    parser.add_argument("--tamanho-lote", type=int, default=500)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", type=Path, default=DIRETORIO_RESULTADOS)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documentos = gerar_documentos(rng, nomes_motoristas(500), args.mensagens)
+    mensagens = [serializar_corrida(dict(documento)).encode("utf-8") for documento in documentos]
+    lotes = [
+        ("[" + ",".join(mensagem.decode("utf-8") for mensagem in mensagens[inicio:inicio + args.tamanho_lote]) + "]").encode("utf-8")
+        for inicio in range(0, len(mensagens), args.tamanho_lote)
+    ]
+
+    individuais = {
+        "anterior": medir(_anterior, mensagens, args.repeticoes),
+        "anterior_modelo": medir(_anterior_modelo, mensagens, args.repeticoes),
+        "validate_json": medir(decodificar_corrida, mensagens, args.repeticoes),
+    }
+    em_lote = {
+        "anterior": medir(_anterior_lote, lotes, args.repeticoes, args.tamanho_lote),
+        "validate_json": medir(decodificar_lote, lotes, args.repeticoes, args.tamanho_lote),
+    }
+    for medidas in (individuais, em_lote):
+        base = medidas["anterior"]["por_corrida_us"]
+        for medida in medidas.values():
+            medida["aceleracao"] = round(base / medida["por_corrida_us"], 2)
+
+    resultado = {
+        **metadados(),
+        "parametros": {
+            "mensagens": args.mensagens,
+            "tamanho_lote": args.tamanho_lote,
+            "repeticoes": args.repeticoes,
+        },
+        "cenarios": {"individual": individuais, "lote": em_lote},
+    }
+
+    for nome, medidas in resultado["cenarios"].items():
+        print(nome)
+        for modo, medida in medidas.items():
+            print(f"  {modo:<16} {medida['por_corrida_us']:>9.3f} us/corrida  {medida['aceleracao']}x")
+
+    arquivo = gravar(resultado, args.saida, "decodificacao")
+    print(f"Resultado gravado em {arquivo}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
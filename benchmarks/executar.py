@@ -0,0 +1,284 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from benchmarks.ambiente import encerrar_ambiente, montar_ambiente
+from benchmarks.registro import DIRETORIO_RESULTADOS, gravar, metadados
+from benchmarks.carga import (
+    carga_aberta,
+    gerar_corrida,
+    gerar_documentos,
+    nomes_motoristas,
+    percentis,
+)
+
+logger = logging.getLogger("benchmarks")
+
+CENARIOS = ("ingestao", "consumer", "listagem")
+
+# Configuração da aplicação que muda os números; vai junto no resultado.
+VARIAVEIS_RELEVANTES = (
+    "CONSUMER_BATCH_SIZE",
+    "CONSUMER_BATCH_TIMEOUT_MS",
+    "CONSUMER_CONCURRENCY",
+    "PRODUCER_BATCH_SIZE",
+    "PRODUCER_FLUSH_INTERVAL_MS",
+    "RABBITMQ_PARTITIONS",
+    "SALDO_STORAGE",
+    "CACHE_CORRIDAS_ENABLED",
+    "OUTBOX_ENABLED",
+    "MONGO_CURSOR_BATCH_SIZE",
+)
+
+class RegistroPersistencia:
+    # Envolve _processar_lote do consumer para anotar quando cada corrida
+    # terminou de ser gravada (MongoDB e Redis). instalar() precisa rodar
+    # antes de consumer.configurar(): com CONSUMER_BATCH_SIZE > 1 o
+    # agrupador guarda a função que existir naquele momento.
+    def __init__(self):
+        self.gravadas = {}
+        self._original = None
+
+    def instalar(self, consumer):
+        self._original = consumer._processar_lote
+        consumer._processar_lote = self._processar_lote
+
+    async def _processar_lote(self, corridas):
+        await self._original(corridas)
+        agora = time.perf_counter()
+        for corrida in corridas:
+            self.gravadas.setdefault(corrida["id_corrida"], agora)
+
+    async def aguardar(self, ids, limite_s: float) -> bool:
+        prazo = time.perf_counter() + limite_s
+        while time.perf_counter() < prazo:
+            if all(id_corrida in self.gravadas for id_corrida in ids):
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+def _vazao(instantes) -> float:
+    if len(instantes) < 2:
+        return 0.0
+    return round(len(instantes) / (max(instantes) - min(instantes)), 2)
+
+async def cenario_ingestao(ambiente, cliente, registro, args, rng, motoristas) -> dict:
+    # POST /corridas em taxa constante; mede a latência do POST e o atraso
+    # entre o envio e a gravação pelo consumer.
+    enviadas = {}
+
+    async def postar(_):
+        corrida = gerar_corrida(rng, motoristas)
+        inicio = time.perf_counter()
+        resposta = await cliente.post("/corridas", json=corrida)
+        resposta.raise_for_status()
+        enviadas[resposta.json()["id_corrida"]] = inicio
+
+    resultado = await carga_aberta(args.taxa, args.duracao, postar, args.max_em_voo)
+    completo = await registro.aguardar(enviadas, args.espera)
+
+    atrasos = [
+        registro.gravadas[id_corrida] - inicio
+        for id_corrida, inicio in enviadas.items()
+        if id_corrida in registro.gravadas
+    ]
+    instantes = [registro.gravadas[id_corrida] for id_corrida in enviadas if id_corrida in registro.gravadas]
+
+    return {
+        "post": resultado,
+        "publicacao_ate_gravacao": percentis(atrasos),
+        "gravadas": len(atrasos),
+        "todas_gravadas": completo,
+        "consumer_mensagens_por_segundo": _vazao(instantes),
+    }
+
+async def cenario_consumer(ambiente, cliente, registro, args, rng, motoristas) -> dict:
+    # Publica direto no broker, sem passar pela API, e mede quantas
+    # mensagens por segundo o consumer grava.
+    from src.producer import serializar_corrida
+
+    producer = ambiente.producer
+    corridas = []
+    for indice in range(args.mensagens):
+        corrida = gerar_corrida(rng, motoristas)
+        corrida["id_corrida"] = f"c{indice:09d}"
+        corrida["data_criacao"] = datetime.now()
+        corridas.append(corrida)
+
+    limite = asyncio.Semaphore(args.concorrencia)
+
+    async def publicar(corrida):
+        async with limite:
+            await producer.publicar_mensagem(
+                serializar_corrida(dict(corrida)), producer.fila_corrida(corrida)
+            )
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(publicar(corrida) for corrida in corridas))
+    publicacao = time.perf_counter() - inicio
+
+    ids = [corrida["id_corrida"] for corrida in corridas]
+    completo = await registro.aguardar(ids, args.espera)
+    gravadas = [registro.gravadas[id_corrida] for id_corrida in ids if id_corrida in registro.gravadas]
+    total = (max(gravadas) - inicio) if gravadas else 0.0
+
+    return {
+        "mensagens": len(corridas),
+        "concorrencia_publicacao": args.concorrencia,
+        "publicacao_s": round(publicacao, 3),
+        "gravacao_s": round(total, 3),
+        "gravadas": len(gravadas),
+        "todas_gravadas": completo,
+        "mensagens_por_segundo": round(len(gravadas) / total, 2) if total else 0.0,
+    }
+
+async def _percorrer(cliente, caminho: str, paginas: int, limite: int) -> list:
+    latencias = []
+    after = None
+    for _ in range(paginas):
+        params = {"limit": limite}
+        if after:
+            params["after"] = after
+        inicio = time.perf_counter()
+        resposta = await cliente.get(caminho, params=params)
+        resposta.raise_for_status()
+        latencias.append(time.perf_counter() - inicio)
+        after = resposta.headers.get("X-Next-Cursor")
+        if not after:
+            break
+    return latencias
+
+async def cenario_listagem(ambiente, cliente, registro, args, rng, motoristas) -> dict:
+    # Popula a coleção até cada tamanho e percorre as primeiras páginas de
+    # GET /corridas e GET /corridas/{forma_pagamento}. A primeira passada
+    # encontra o cache frio; as demais medem o cache quente.
+    from src.cache import CHAVE_VERSAO_CORRIDAS
+    from src.database.mongo_client import get_corridas_collection
+
+    collection = get_corridas_collection()
+    existentes = await collection.count_documents({"id_corrida": {"$regex": "^b"}})
+    resultados = {}
+
+    for tamanho in sorted(args.tamanhos):
+        while existentes < tamanho:
+            lote = min(5000, tamanho - existentes)
+            await collection.insert_many(gerar_documentos(rng, motoristas, lote, existentes))
+            existentes += lote
+        await ambiente.redis_bytes.incr(CHAVE_VERSAO_CORRIDAS)
+
+        por_rota = {}
+        for nome, caminho in (("listar", "/corridas"), ("pagamento", "/corridas/pix")):
+            frio = await _percorrer(cliente, caminho, args.paginas, args.limite)
+            quente = []
+            for _ in range(args.repeticoes):
+                quente.extend(await _percorrer(cliente, caminho, args.paginas, args.limite))
+            por_rota[nome] = {"frio": percentis(frio), "quente": percentis(quente)}
+
+        resultados[str(tamanho)] = por_rota
+        logger.warning(f"Listagem com {tamanho} documentos concluída")
+
+    return {"limite": args.limite, "paginas": args.paginas, "por_tamanho": resultados}
+
+EXECUTORES = {
+    "ingestao": cenario_ingestao,
+    "consumer": cenario_consumer,
+    "listagem": cenario_listagem,
+}
+
+def _metadados(args, ambiente) -> dict:
+    return {
+        **metadados(),
+        "ambiente": ambiente.descricao,
+        "configuracao": {nome: os.environ[nome] for nome in VARIAVEIS_RELEVANTES if nome in os.environ},
+        "parametros": {
+            chave: valor for chave, valor in vars(args).items() if chave not in ("saida",)
+        },
+    }
+
+async def executar(args) -> dict:
+    registro = RegistroPersistencia()
+    ambiente = await montar_ambiente(registro.instalar)
+    rng = random.Random(args.seed)
+    motoristas = nomes_motoristas(args.motoristas)
+    resultado = _metadados(args, ambiente)
+    resultado["cenarios"] = {}
+    resultado["falhas"] = []
+
+    transporte = httpx.ASGITransport(app=ambiente.main.app)
+    try:
+        async with httpx.AsyncClient(transport=transporte, base_url="http://transflow") as cliente:
+            for cenario in args.cenarios:
+                logger.warning(f"Executando cenário {cenario}")
+                medida = resultado["cenarios"][cenario] = await EXECUTORES[cenario](
+                    ambiente, cliente, registro, args, rng, motoristas
+                )
+                # Números de um cenário em que nem tudo foi gravado não
+                # medem o consumer; o comando sai com erro.
+                if medida.get("todas_gravadas") is False:
+                    logger.error(
+                        f"Cenário {cenario}: {medida.get('gravadas', 0)} corridas gravadas "
+                        f"em {args.espera}s, esperado todas"
+                    )
+                    resultado["falhas"].append(cenario)
+    finally:
+        await encerrar_ambiente(ambiente)
+
+    return resultado
+
+def _lista(valor: str) -> list:
+    return [item.strip() for item in valor.split(",") if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark de ponta a ponta da TransFlow (API + consumer)"
+    )
+    parser.add_argument("--cenarios", type=_lista, default=list(CENARIOS),
+                        help=f"Lista separada por vírgulas entre: {', '.join(CENARIOS)}")
+    parser.add_argument("--taxa", type=float, default=200, help="POST /corridas por segundo")
+    parser.add_argument("--duracao", type=float, default=10, help="Duração da carga de POST em segundos")
+    parser.add_argument("--max-em-voo", type=int, default=2000, help="Limite de requisições simultâneas")
+    parser.add_argument("--mensagens", type=int, default=5000, help="Mensagens do cenário consumer")
+    parser.add_argument("--concorrencia", type=int, default=100, help="Publicações simultâneas no cenário consumer")
+    parser.add_argument("--tamanhos", type=lambda v: [int(x) for x in _lista(v)],
+                        default=[1000, 10000, 100000], help="Tamanhos da coleção na listagem")
+    parser.add_argument("--paginas", type=int, default=5, help="Páginas percorridas por passada")
+    parser.add_argument("--limite", type=int, default=100, help="Parâmetro limit da listagem")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Passadas com cache quente")
+    parser.add_argument("--motoristas", type=int, default=500, help="Quantidade de motoristas sintéticos")
+    parser.add_argument("--espera", type=float, default=60, help="Segundos para aguardar a gravação")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", type=Path, default=DIRETORIO_RESULTADOS,
+                        help="Diretório dos arquivos JSON de resultado")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    desconhecidos = set(args.cenarios) - set(CENARIOS)
+    if desconhecidos:
+        parser.error(f"Cenários desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    # Lido por src.logging_config quando a aplicação é importada.
+    os.environ["LOG_LEVEL"] = args.log_level
+    logging.basicConfig(level=args.log_level)
+
+    resultado = asyncio.run(executar(args))
+
+    arquivo = gravar(resultado, args.saida)
+
+    json.dump(resultado["cenarios"], sys.stdout, indent=2, ensure_ascii=False)
+    print(f"\nResultado gravado em {arquivo}")
+
+    if resultado["falhas"]:
+        print(f"Cenários com corridas não gravadas: {', '.join(resultado['falhas'])}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
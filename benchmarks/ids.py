@@ -0,0 +1,134 @@
+import sys
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+from benchmarks.ambiente import BENCH_MONGO_DB, _conectar_mongo
+from benchmarks.carga import gerar_corrida, nomes_motoristas
+from benchmarks.registro import DIRETORIO_RESULTADOS, gravar, metadados
+from src.database.indices import criar_indices_corridas
+from src.ids import nova_corrida_id
+
+# Vazão de gravação na coleção de corridas com cada gerador de id_corrida:
+#   uuid8     - str(uuid.uuid4())[:8], o gerador anterior (32 bits aleatórios)
+#   ordenado  - src.ids, prefixo de tempo + parte aleatória monotônica
+# As corridas são gravadas como o consumer grava (bulk_write de upserts por
+# id_corrida), com os índices da aplicação. Upserts que encontram um
+# documento existente são colisões: duas corridas mescladas em uma.
+#
+# A diferença de localidade no índice só aparece com um mongod de verdade
+# (BENCH_MONGO_URI) e uma coleção maior que o cache do WiredTiger.
+#
+#   python -m benchmarks.ids [--corridas 1000000] [--lote 1000]
+
+def _uuid8():
+    return str(uuid.uuid4())[:8]
+
+def _ordenado():
+    return nova_corrida_id()[0]
+
+GERADORES = {
+    "uuid8": _uuid8,
+    "ordenado": _ordenado,
+}
+
+async def _tamanho_indices(banco, nome: str) -> dict:
+    try:
+        estatisticas = await banco.command("collStats", nome)
+    except Exception:
+        return {}
+    return {indice: tamanho for indice, tamanho in estatisticas.get("indexSizes", {}).items()}
+
+async def medir(banco, modo: str, gerar_id, args, rng, motoristas) -> dict:
+    nome = f"ids_{modo}"
+    await banco.drop_collection(nome)
+    collection = banco[nome]
+    await criar_indices_corridas(collection)
+
+    modelo = [gerar_corrida(rng, motoristas) for _ in range(args.lote)]
+    gravadas = colisoes = 0
+    geracao = 0.0
+    tempos = []
+
+    inicio = time.perf_counter()
+    while gravadas < args.corridas:
+        quantidade = min(args.lote, args.corridas - gravadas)
+
+        inicio_geracao = time.perf_counter()
+        ids = [gerar_id() for _ in range(quantidade)]
+        geracao += time.perf_counter() - inicio_geracao
+
+        operacoes = [
+            UpdateOne({"id_corrida": id_corrida}, {"$set": {**corrida, "id_corrida": id_corrida}}, upsert=True)
+            for id_corrida, corrida in zip(ids, modelo)
+        ]
+        inicio_lote = time.perf_counter()
+        resultado = await collection.bulk_write(operacoes, ordered=False)
+        tempos.append(time.perf_counter() - inicio_lote)
+
+        colisoes += resultado.matched_count
+        gravadas += quantidade
+    total = time.perf_counter() - inicio
+
+    ultimo_decil = tempos[-max(1, len(tempos) // 10):]
+    return {
+        "corridas": gravadas,
+        "total_s": round(total, 3),
+        "corridas_por_segundo": round(gravadas / total, 1),
+        # Vazão do último décimo da carga, quando o índice já está grande.
+        "corridas_por_segundo_final": round(len(ultimo_decil) * args.lote / sum(ultimo_decil), 1),
+        "geracao_us_por_id": round(1e6 * geracao / gravadas, 3),
+        "colisoes": colisoes,
+        "documentos": await collection.count_documents({}),
+        "tamanho_indices": await _tamanho_indices(banco, nome),
+    }
+
+async def executar(args) -> dict:
+    cliente, descricao = await _conectar_mongo()
+    banco = cliente[BENCH_MONGO_DB]
+    motoristas = nomes_motoristas(500)
+
+    resultado = {
+        **metadados(),
+        "ambiente": {"mongo": descricao},
+        "parametros": {"corridas": args.corridas, "lote": args.lote},
+        "cenarios": {},
+    }
+    for modo in args.modos:
+        resultado["cenarios"][modo] = await medir(
+            banco, modo, GERADORES[modo], args, random.Random(args.seed), motoristas
+        )
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de gravação com cada gerador de id_corrida")
+    parser.add_argument("--corridas", type=int, default=200000)
+    parser.add_argument("--lote", type=int, default=1000)
+    parser.add_argument("--modos", type=lambda v: [m for m in v.split(",") if m], default=list(GERADORES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", type=Path, default=DIRETORIO_RESULTADOS)
+    args = parser.parse_args()
+
+    desconhecidos = set(args.modos) - set(GERADORES)
+    if desconhecidos:
+        parser.error(f"Modos desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    resultado = asyncio.run(executar(args))
+
+    for modo, medida in resultado["cenarios"].items():
+        print(
+            f"{modo:<10} {medida['corridas_por_segundo']:>10.1f} corridas/s"
+            f"  final {medida['corridas_por_segundo_final']:>10.1f}/s"
+            f"  colisões {medida['colisoes']}"
+        )
+
+    arquivo = gravar(resultado, args.saida, "ids")
+    print(f"Resultado gravado em {arquivo}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+DIRETORIO_RESULTADOS = Path(__file__).parent / "resultados"
+
+def _git(*argumentos: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *argumentos], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+def metadados() -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "alteracoes_locais": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "data": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+    }
+
+def gravar(resultado: dict, saida: Path, nome: str = "") -> Path:
+    # <data>-<commit>[-nome].json, para comparar execuções entre commits.
+    saida.mkdir(parents=True, exist_ok=True)
+    carimbo = datetime.now().strftime("%Y%m%d-%H%M%S")
+    sufixo = f"-{nome}" if nome else ""
+    arquivo = saida / f"{carimbo}-{(resultado.get('commit') or 'sem-git')[:8]}{sufixo}.json"
+    arquivo.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    return arquivo
@@ -0,0 +1,93 @@
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.carga import gerar_documentos, nomes_motoristas
+from benchmarks.registro import DIRETORIO_RESULTADOS, gravar, metadados
+from src.serializacao import (
+    corridas_json_rapido,
+    corridas_json_validado,
+    corridas_ndjson,
+    lista_corridas_adapter,
+)
+
+# Compara a serialização de uma página de corridas:
+#   response_model  - o que o FastAPI faz com response_model=List[CorridaResponse]:
+#                     valida cada item, jsonable_encoder e json.dumps
+#   type_adapter    - TypeAdapter.validate_python + dump_json (CORRIDAS_VALIDAR_RESPOSTA=true)
+#   orjson          - caminho rápido: documentos projetados direto no orjson
+# e, para o NDJSON, json.dumps por linha contra orjson.
+#
+#   python -m benchmarks.serializacao [--tamanhos 1000,10000,100000] [--repeticoes 5]
+
+def _response_model(documentos):
+    modelos = lista_corridas_adapter.validate_python(documentos)
+    return json.dumps(jsonable_encoder(modelos), ensure_ascii=False).encode("utf-8")
+
+def _ndjson_json(documentos):
+    return "".join(
+        json.dumps(documento, default=lambda valor: valor.isoformat(), ensure_ascii=False) + "\n"
+        for documento in documentos
+    ).encode("utf-8")
+
+MODOS = {
+    "response_model": _response_model,
+    "type_adapter": corridas_json_validado,
+    "orjson": corridas_json_rapido,
+    "ndjson_json": _ndjson_json,
+    "ndjson_orjson": corridas_ndjson,
+}
+REFERENCIAS = {"type_adapter": "response_model", "orjson": "response_model", "ndjson_orjson": "ndjson_json"}
+
+def medir(funcao, documentos, repeticoes: int) -> dict:
+    tempos = []
+    tamanho = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        corpo = funcao(documentos)
+        tempos.append(time.perf_counter() - inicio)
+        tamanho = len(corpo)
+    return {
+        "mediana_ms": round(1000 * statistics.median(tempos), 3),
+        "minimo_ms": round(1000 * min(tempos), 3),
+        "bytes": tamanho,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da serialização das listagens")
+    parser.add_argument("--tamanhos", type=lambda v: [int(x) for x in v.split(",") if x],
+                        default=[1000, 10000, 100000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", type=Path, default=DIRETORIO_RESULTADOS)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    motoristas = nomes_motoristas(500)
+    resultado = {**metadados(), "parametros": {"repeticoes": args.repeticoes}, "cenarios": {}}
+
+    for tamanho in args.tamanhos:
+        documentos = gerar_documentos(rng, motoristas, tamanho)
+        por_modo = {nome: medir(funcao, documentos, args.repeticoes) for nome, funcao in MODOS.items()}
+        for nome, referencia in REFERENCIAS.items():
+            por_modo[nome]["aceleracao"] = round(
+                por_modo[referencia]["mediana_ms"] / por_modo[nome]["mediana_ms"], 2
+            )
+        resultado["cenarios"][str(tamanho)] = por_modo
+
+        print(f"{tamanho} documentos")
+        for nome, medida in por_modo.items():
+            aceleracao = f"  {medida['aceleracao']}x" if "aceleracao" in medida else ""
+            print(f"  {nome:<16} {medida['mediana_ms']:>10.3f} ms{aceleracao}")
+
+    arquivo = gravar(resultado, args.saida, "serializacao")
+    print(f"Resultado gravado em {arquivo}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Agrupa itens submetidos concorrentemente e os processa em lotes: um lote
+# fecha ao atingir tamanho_lote itens ou intervalo_ms após o primeiro item.
+# Cada chamador recebe o seu resultado (ou a exceção do lote inteiro).
+# Com capacidade > 0 a fila é limitada e enfileirar() lança asyncio.QueueFull
+# quando ela está cheia, para o chamador aplicar backpressure.
+# Com lotes_simultaneos > 1 o próximo lote começa a ser coletado enquanto os
+# anteriores ainda estão em processamento (até esse número ao mesmo tempo);
+# com 1, o padrão, os lotes são processados um de cada vez, em ordem.
+class AgrupadorLote:
+    def __init__(
+        self,
+        processar: Callable[[List[Any]], Awaitable[Optional[List[Any]]]],
+        tamanho_lote: int,
+        intervalo_ms: float,
+        nome: str = "lote",
+        capacidade: int = 0,
+        lotes_simultaneos: int = 1
+    ):
+        self._processar = processar
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.intervalo = max(0.0, intervalo_ms) / 1000
+        self.nome = nome
+        self._fila: asyncio.Queue = asyncio.Queue(maxsize=max(0, capacidade))
+        self._vagas = asyncio.Semaphore(max(1, lotes_simultaneos))
+        self._em_andamento: Set[asyncio.Task] = set()
+        self._tarefa: Optional[asyncio.Task] = None
+
+    def iniciar(self):
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self):
+        if self._tarefa is None:
+            return
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+
+        em_andamento = list(self._em_andamento)
+        for tarefa in em_andamento:
+            tarefa.cancel()
+        await asyncio.gather(*em_andamento, return_exceptions=True)
+
+        while not self._fila.empty():
+            _, futuro = self._fila.get_nowait()
+            if not futuro.done():
+                futuro.cancel()
+
+    @property
+    def pendentes(self) -> int:
+        return self._fila.qsize()
+
+    def enfileirar(self, item: Any) -> asyncio.Future:
+        futuro = asyncio.get_running_loop().create_future()
+        self._fila.put_nowait((item, futuro))
+        return futuro
+
+    async def submeter(self, item: Any) -> Any:
+        return await self.enfileirar(item)
+
+    async def _coletar(self) -> list:
+        lote = [await self._fila.get()]
+        loop = asyncio.get_running_loop()
+        prazo = loop.time() + self.intervalo
+
+        while len(lote) < self.tamanho_lote:
+            if not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+                continue
+
+            restante = prazo - loop.time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self._fila.get(), restante))
+            except asyncio.TimeoutError:
+                break
+
+        return lote
+
+    async def _executar(self):
+        while True:
+            await self._vagas.acquire()
+            try:
+                lote = await self._coletar()
+            except BaseException:
+                self._vagas.release()
+                raise
+            tarefa = asyncio.create_task(self._processar_lote(lote))
+            self._em_andamento.add(tarefa)
+            tarefa.add_done_callback(self._lote_concluido)
+
+    def _lote_concluido(self, tarefa: asyncio.Task):
+        self._em_andamento.discard(tarefa)
+        self._vagas.release()
+
+    async def _processar_lote(self, lote: list):
+        itens = [item for item, _ in lote]
+
+        try:
+            resultados = await self._processar(itens)
+        except asyncio.CancelledError:
+            for _, futuro in lote:
+                futuro.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao processar {self.nome} com {len(itens)} itens: {e}")
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        if resultados is None:
+            resultados = [None] * len(lote)
+
+        for (_, futuro), resultado in zip(lote, resultados):
+            if futuro.done():
+                continue
+            if isinstance(resultado, BaseException):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
@@ -0,0 +1,97 @@
+import os
+import time
+import hashlib
+import logging
+from typing import Iterable, Optional, Tuple
+
+import orjson
+
+from src.database.redis_scripts import GUARDAR_CACHE
+
+logger = logging.getLogger(__name__)
+
+# Chave incrementada a cada escrita em "corridas" (consumer após upserts,
+# DELETE /corridas/{id}); entradas gravadas com outra versão são ignoradas.
+CHAVE_VERSAO_CORRIDAS = "cache:corridas:versao"
+PREFIXO_CACHE_CORRIDAS = "cache:corridas:"
+INDICE_CACHE_CORRIDAS = "cache:corridas:indice"
+PREFIXO_CORRIDA_RECENTE = "corrida:recente:"
+
+# Cache das respostas já serializadas de GET /corridas e
+# GET /corridas/{forma_pagamento}. Cada entrada guarda
+# "versão\ncursor\ncorpo", então uma leitura é um único MGET.
+class CacheCorridas:
+    def __init__(self, client_factory):
+        self._client_factory = client_factory
+        self._guardar = None
+        self.habilitado = os.getenv("CACHE_CORRIDAS_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.ttl = int(os.getenv("CACHE_CORRIDAS_TTL_SECONDS", "30"))
+        self.max_entradas = int(os.getenv("CACHE_CORRIDAS_MAX_ENTRIES", "1000"))
+        self.max_bytes = int(os.getenv("CACHE_CORRIDAS_MAX_ENTRY_BYTES", str(1024 * 1024)))
+
+    @property
+    def client(self):
+        return self._client_factory()
+
+    def _chave(self, consulta: str) -> str:
+        digest = hashlib.sha1(consulta.encode("utf-8")).hexdigest()
+        return f"{PREFIXO_CACHE_CORRIDAS}{digest}"
+
+    async def obter(self, consulta: str) -> Tuple[Optional[Tuple[bytes, Optional[str]]], bytes]:
+        # Devolve (corpo, cursor) em caso de acerto e a versão atual, que deve
+        # ser repassada para guardar() depois de consultar o MongoDB.
+        versao, entrada = await self.client.mget(CHAVE_VERSAO_CORRIDAS, self._chave(consulta))
+        versao = versao or b"0"
+        if entrada is None:
+            return None, versao
+
+        versao_entrada, cursor, corpo = entrada.split(b"\n", 2)
+        if versao_entrada != versao:
+            return None, versao
+
+        return (corpo, cursor.decode("ascii") or None), versao
+
+    async def guardar(self, consulta: str, versao: bytes, corpo: bytes, cursor: Optional[str]):
+        if len(corpo) > self.max_bytes:
+            return
+
+        if self._guardar is None:
+            self._guardar = self.client.register_script(GUARDAR_CACHE)
+
+        valor = b"\n".join([versao, (cursor or "").encode("ascii"), corpo])
+        await self._guardar(
+            keys=[self._chave(consulta), INDICE_CACHE_CORRIDAS],
+            args=[valor, self.ttl, time.time(), self.max_entradas]
+        )
+
+    async def invalidar(self) -> int:
+        return await self.client.incr(CHAVE_VERSAO_CORRIDAS)
+
+# Corridas aceitas pela API (POST /corridas e /corridas/batch), gravadas no
+# momento da publicação com TTL curto. GET /corridas/id/{id_corrida} recorre
+# a elas quando a corrida ainda não chegou ao MongoDB.
+class CacheCorridasRecentes:
+    def __init__(self, client_factory):
+        self._client_factory = client_factory
+        self.ttl = int(os.getenv("CACHE_CORRIDAS_RECENTES_TTL_SECONDS", "300"))
+        self.habilitado = self.ttl > 0
+
+    @property
+    def client(self):
+        return self._client_factory()
+
+    def _chave(self, id_corrida: str) -> str:
+        return f"{PREFIXO_CORRIDA_RECENTE}{id_corrida}"
+
+    async def guardar(self, corridas: Iterable[dict]):
+        pipe = self.client.pipeline(transaction=False)
+        for corrida in corridas:
+            pipe.set(self._chave(corrida["id_corrida"]), orjson.dumps(corrida), ex=self.ttl)
+        await pipe.execute()
+
+    async def obter(self, id_corrida: str) -> Optional[dict]:
+        valor = await self.client.get(self._chave(id_corrida))
+        return orjson.loads(valor) if valor is not None else None
+
+    async def remover(self, id_corrida: str) -> int:
+        return await self.client.delete(self._chave(id_corrida))
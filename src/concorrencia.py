@@ -0,0 +1,97 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable
+
+# Limita a quantidade de mensagens processadas ao mesmo tempo e serializa as
+# que compartilham uma chave (motorista, id_corrida). As travas são
+# adquiridas em ordem alfabética para evitar deadlock entre mensagens com
+# várias chaves, e o asyncio.Lock atende na ordem de chegada, então a ordem
+# de entrega da fila é preservada por chave.
+class FaixasPorChave:
+    def __init__(self, limite: int):
+        self.limite = max(1, limite)
+        self._semaforo = asyncio.Semaphore(self.limite)
+        self._travas: Dict[str, asyncio.Lock] = {}
+        self._usos: Dict[str, int] = {}
+
+        self.em_andamento = 0
+        self.pico_em_andamento = 0
+        self.processadas = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+    @property
+    def faixas_ativas(self) -> int:
+        return len(self._travas)
+
+    def _trava(self, chave: str) -> asyncio.Lock:
+        trava = self._travas.get(chave)
+        if trava is None:
+            trava = self._travas[chave] = asyncio.Lock()
+        self._usos[chave] = self._usos.get(chave, 0) + 1
+        return trava
+
+    def _liberar(self, chave: str):
+        restantes = self._usos[chave] - 1
+        if restantes:
+            self._usos[chave] = restantes
+        else:
+            del self._usos[chave]
+            del self._travas[chave]
+
+    @asynccontextmanager
+    async def faixa(self, chaves: Iterable[str]):
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        chaves = sorted(set(chaves))
+        adquiridas = []
+
+        try:
+            for chave in chaves:
+                trava = self._trava(chave)
+                try:
+                    await trava.acquire()
+                except BaseException:
+                    self._liberar(chave)
+                    raise
+                adquiridas.append(chave)
+            await self._semaforo.acquire()
+        except BaseException:
+            for chave in reversed(adquiridas):
+                self._travas[chave].release()
+                self._liberar(chave)
+            raise
+
+        espera = loop.time() - inicio
+        self.espera_total += espera
+        self.espera_maxima = max(self.espera_maxima, espera)
+        self.em_andamento += 1
+        self.pico_em_andamento = max(self.pico_em_andamento, self.em_andamento)
+
+        try:
+            yield espera
+        finally:
+            self.em_andamento -= 1
+            self.processadas += 1
+            self._semaforo.release()
+            for chave in reversed(adquiridas):
+                self._travas[chave].release()
+                self._liberar(chave)
+
+    def resumo(self, reiniciar: bool = True) -> dict:
+        resumo = {
+            "limite": self.limite,
+            "em_andamento": self.em_andamento,
+            "pico_em_andamento": self.pico_em_andamento,
+            "faixas_ativas": self.faixas_ativas,
+            "processadas": self.processadas,
+            "espera_media_ms": round(1000 * self.espera_total / self.processadas, 3)
+            if self.processadas else 0.0,
+            "espera_maxima_ms": round(1000 * self.espera_maxima, 3),
+        }
+        if reiniciar:
+            self.pico_em_andamento = self.em_andamento
+            self.processadas = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+        return resumo
@@ -1,19 +1,46 @@
 # src/consumer.py
 import os
-import json
+import time
 import asyncio
 import logging
-from datetime import datetime
-from typing import Any
+from typing import Any, List
 
 from faststream import FastStream
+from faststream.exceptions import NackMessage, RejectMessage
 from faststream.rabbit import RabbitBroker
+from faststream.rabbit.annotations import RabbitMessage
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 import redis.asyncio as aioredis
-from dateutil import parser as date_parser
+from redis.exceptions import NoScriptError
 
-logging.basicConfig(level=logging.INFO)
+from src import metrics
+from src.logging_config import configurar_logging
+from src.batching import AgrupadorLote
+from src.concorrencia import FaixasPorChave
+from src.particionamento import RABBITMQ_PARTITIONS, fila_rabbit, particoes_do_consumidor
+from src.cache import CHAVE_VERSAO_CORRIDAS
+from src.database.indices import criar_indices, criar_indices_corridas
+from src.database.rollups import COLECAO_ROLLUPS, INDICES_ROLLUPS, chaves_rollup, operacoes_rollup
+from src.database.redis_scripts import CREDITAR_SALDO, CREDITAR_SALDO_CENTAVOS
+from src.database.saldo_layout import (
+    bucket_saldo,
+    chave_saldo,
+    de_centavos,
+    normalizar_motorista,
+    para_centavos,
+    usa_hash,
+)
+from src.database.ranking import RANKING_DIARIO_TTL_SECONDS, chaves_ranking_corrida
+from src.models.corrida_mensagem import (
+    MensagemInvalida,
+    decodificar_corrida,
+    decodificar_lote,
+    eh_lote,
+)
+
+configurar_logging("consumer")
 logger = logging.getLogger("consumer")
 
 RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
@@ -28,121 +55,419 @@ MONGO_COLLECTION = os.getenv("MONGO_COLLECTION", "corridas")
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 
+# Com CONSUMER_BATCH_SIZE > 1 o consumer agrupa até N mensagens (ou espera
+# até CONSUMER_BATCH_TIMEOUT_MS) e grava o lote com um bulk_write e um
+# pipeline Redis; as mensagens só são confirmadas depois do lote.
+CONSUMER_BATCH_SIZE = int(os.getenv("CONSUMER_BATCH_SIZE", "1"))
+CONSUMER_BATCH_TIMEOUT_MS = float(os.getenv("CONSUMER_BATCH_TIMEOUT_MS", "50"))
+
+# Quantas mensagens são tratadas ao mesmo tempo nesta instância. Mensagens do
+# mesmo motorista (ou do mesmo id_corrida) continuam em ordem: cada chave tem
+# a sua faixa e só uma mensagem por faixa avança de cada vez.
+CONSUMER_CONCURRENCY = int(os.getenv("CONSUMER_CONCURRENCY", "1"))
+CONSUMER_METRICS_LOG_INTERVAL = float(os.getenv("CONSUMER_METRICS_LOG_INTERVAL", "30"))
+
+# Porta do endpoint Prometheus do consumer (0 desliga) e intervalo de
+# amostragem da profundidade das filas.
+CONSUMER_METRICS_PORT = int(os.getenv("CONSUMER_METRICS_PORT", "9100"))
+CONSUMER_QUEUE_DEPTH_INTERVAL = float(os.getenv("CONSUMER_QUEUE_DEPTH_INTERVAL", "15"))
+
+# Por quanto tempo um id_corrida já creditado é lembrado; reentregas dentro
+# dessa janela não creditam o saldo de novo.
+CORRIDA_DEDUP_TTL_SECONDS = int(os.getenv("CORRIDA_DEDUP_TTL_SECONDS", "604800"))
+
 rabbitmq_url = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASSWORD}@{RABBITMQ_HOST}:{RABBITMQ_PORT}/"
 
-broker = RabbitBroker(rabbitmq_url)
+# O prefetch precisa cobrir tanto o paralelismo quanto um lote inteiro.
+CONSUMER_PREFETCH = max(CONSUMER_CONCURRENCY, CONSUMER_BATCH_SIZE)
+
+broker = RabbitBroker(
+    rabbitmq_url,
+    max_consumers=CONSUMER_PREFETCH if CONSUMER_PREFETCH > 1 else None
+)
 app = FastStream(broker)
 
 mongo_client: AsyncIOMotorClient | None = None
 mongo_collection = None
+rollups_collection = None
 redis_client: aioredis.Redis | None = None
+agrupador: AgrupadorLote | None = None
+creditar_saldo = None
+faixas = FaixasPorChave(CONSUMER_CONCURRENCY)
+tarefa_metricas: asyncio.Task | None = None
+tarefa_filas: asyncio.Task | None = None
 
 
-def _safe_parse_message(message: Any) -> dict:
-    if isinstance(message, dict):
-        return message
-    if isinstance(message, bytes):
-        text = message.decode("utf-8")
-    else:
-        text = str(message)
+SCRIPT_CREDITO = CREDITAR_SALDO_CENTAVOS if usa_hash() else CREDITAR_SALDO
 
-    return json.loads(text)
+def _argumentos_credito(corrida: dict) -> tuple[list, list]:
+    marcador = f"corrida:processada:{corrida['id_corrida']}"
+    motorista = corrida["motorista"]["nome"]
+    centavos = para_centavos(corrida["valor_corrida"])
+    ranking = chaves_ranking_corrida(corrida["data_criacao"])
+    args_ranking = [centavos, normalizar_motorista(motorista), RANKING_DIARIO_TTL_SECONDS]
 
-async def _ensure_datetime_field(data: dict):
-    if "data_criacao" not in data or not data["data_criacao"]:
-        data["data_criacao"] = datetime.utcnow()
-        return
+    if usa_hash():
+        bucket, campo = bucket_saldo(motorista)
+        args = [centavos, CORRIDA_DEDUP_TTL_SECONDS, campo, *args_ranking]
+        return [marcador, bucket, *ranking], args
 
-    val = data["data_criacao"]
-    if isinstance(val, datetime):
+    args = [corrida["valor_corrida"], CORRIDA_DEDUP_TTL_SECONDS, "", *args_ranking]
+    return [marcador, chave_saldo(motorista), *ranking], args
+
+def _saldo_em_reais(resultado) -> float:
+    return de_centavos(resultado) if usa_hash() else float(resultado)
+
+async def _creditar_saldos(corridas: List[dict]) -> list:
+    # Créditos e a nova versão do cache de listagens seguem em um único
+    # pipeline, depois que o MongoDB já gravou as corridas.
+    # O EVALSHA é enviado direto: configurar() já fez o SCRIPT LOAD. Se o
+    # Redis perdeu o script depois disso (reinício, SCRIPT FLUSH), os EVALSHA
+    # falham sem creditar nada, mas o INCR do pipeline roda mesmo assim; o
+    # lote é reenviado após recarregar o script e a versão do cache sobe
+    # duas vezes, o que só invalida as listagens mais uma vez.
+    for tentativa in range(2):
+        pipe = redis_client.pipeline(transaction=False)
+        for corrida in corridas:
+            chaves, args = _argumentos_credito(corrida)
+            pipe.evalsha(creditar_saldo.sha, len(chaves), *chaves, *args)
+        pipe.incr(CHAVE_VERSAO_CORRIDAS)
+        try:
+            return (await pipe.execute())[:-1]
+        except NoScriptError:
+            if tentativa:
+                raise
+            await redis_client.script_load(SCRIPT_CREDITO)
+
+async def _pendentes_rollup(corridas: List[dict]) -> List[dict]:
+    # Corridas que já existiam e ficaram sem rollup em uma tentativa que
+    # falhou (ver abaixo).
+    por_id = {corrida["id_corrida"]: corrida for corrida in corridas}
+    return [
+        por_id[documento["id_corrida"]]
+        async for documento in mongo_collection.find(
+            {"id_corrida": {"$in": list(por_id)}, "rollup_aplicado": False},
+            {"_id": 0, "id_corrida": 1}
+        )
+    ]
+
+async def _aplicar_rollups(corridas: List[dict], resultado):
+    # Uma corrida nova nasce com rollup_aplicado=True no próprio upsert e
+    # entra nos rollups pelos upserted_ids, sem outra ida ao MongoDB. Se o
+    # $inc falhar, as corridas novas voltam a rollup_aplicado=False antes de
+    # a mensagem voltar para a fila; na reentrega elas já existem
+    # (matched_count > 0) e só então as pendentes são buscadas e marcadas.
+    # Um processo que cai entre o upsert e o $inc deixa a corrida marcada sem
+    # rollup; o --reconstruir de src.database.rollups corrige.
+    novas = [corridas[indice] for indice in resultado.upserted_ids.keys()]
+    ids_novas = {corrida["id_corrida"] for corrida in novas}
+    pendentes = []
+    if resultado.matched_count:
+        pendentes = await _pendentes_rollup(
+            [corrida for corrida in corridas if corrida["id_corrida"] not in ids_novas]
+        )
+    if not novas and not pendentes:
         return
+
     try:
-        data["data_criacao"] = date_parser.isoparse(str(val))
+        await rollups_collection.bulk_write(operacoes_rollup(novas + pendentes), ordered=False)
     except Exception:
-        data["data_criacao"] = datetime.utcnow()
+        if ids_novas:
+            await mongo_collection.update_many(
+                {"id_corrida": {"$in": list(ids_novas)}},
+                {"$set": {"rollup_aplicado": False}}
+            )
+        raise
 
-@app.subscriber(QUEUE_NAME)
-async def processar_corrida_finalizada(message: Any):
-    global mongo_collection, redis_client
+    if pendentes:
+        await mongo_collection.update_many(
+            {"id_corrida": {"$in": [corrida["id_corrida"] for corrida in pendentes]}, "rollup_aplicado": False},
+            {"$set": {"rollup_aplicado": True}}
+        )
+
+async def _processar_lote(corridas: List[dict]):
+    # O upsert no MongoDB é idempotente, por isso vem antes do crédito no Redis:
+    # se o Redis falhar, a mensagem volta para a fila sem duplicar a corrida.
+    operacoes = [
+        UpdateOne(
+            {"id_corrida": corrida["id_corrida"]},
+            {
+                "$set": {**corrida, "rollup_chaves": chaves_rollup(corrida)},
+                "$setOnInsert": {"rollup_aplicado": True},
+            },
+            upsert=True
+        )
+        for corrida in corridas
+    ]
+    metrics.CONSUMER_LOTE_TAMANHO.observe(len(corridas))
+    inicio = time.perf_counter()
+    resultado = await mongo_collection.bulk_write(operacoes, ordered=False)
+    logger.info(
+        "Lote de %d corridas gravado: %d novas, %d atualizadas.",
+        len(corridas), resultado.upserted_count, resultado.modified_count,
+        extra={"evento": "lote_gravado"}
+    )
+
+    await _aplicar_rollups(corridas, resultado)
+    metrics.CONSUMER_ETAPA_MONGO.observe(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    saldos = await _creditar_saldos(corridas)
+    metrics.CONSUMER_ETAPA_REDIS.observe(time.perf_counter() - inicio)
+
+    for corrida, novo_saldo in zip(corridas, saldos):
+        if novo_saldo is None:
+            metrics.CONSUMER_DUPLICADAS.inc()
+            logger.info(
+                "Corrida %s já creditada, saldo mantido.", corrida["id_corrida"],
+                extra={"evento": "corrida_duplicada"}
+            )
+            continue
+        logger.info(
+            "Saldo atualizado para %s: R$ %.2f", corrida["motorista"]["nome"], _saldo_em_reais(novo_saldo),
+            extra={"evento": "saldo_atualizado"}
+        )
 
+def _chaves_corrida(corrida: dict) -> List[str]:
+    return [
+        f"motorista:{normalizar_motorista(corrida['motorista']['nome'])}",
+        f"corrida:{corrida['id_corrida']}",
+    ]
+
+async def _registrar_metricas():
+    while True:
+        await asyncio.sleep(CONSUMER_METRICS_LOG_INTERVAL)
+        resumo = faixas.resumo()
+        if resumo["processadas"] or resumo["em_andamento"]:
+            logger.info(
+                f"Concorrência: {resumo['em_andamento']}/{resumo['limite']} em andamento "
+                f"(pico {resumo['pico_em_andamento']}), {resumo['faixas_ativas']} faixas ativas, "
+                f"{resumo['processadas']} mensagens, espera na faixa média "
+                f"{resumo['espera_media_ms']} ms / máx {resumo['espera_maxima_ms']} ms"
+            )
+
+async def _amostrar_filas():
+    filas = [fila_rabbit(QUEUE_NAME, particao) for particao in PARTICOES]
+    filas = [(fila, metrics.CONSUMER_FILA.labels(fila.name)) for fila in filas]
+    while True:
+        for fila, gauge in filas:
+            try:
+                queue = await broker.declare_queue(fila)
+                declaracao = await queue.declare()
+                gauge.set(declaracao.message_count)
+            except Exception as e:
+                logger.warning(f"Erro ao consultar profundidade da fila {fila.name}: {e}")
+        await asyncio.sleep(CONSUMER_QUEUE_DEPTH_INTERVAL)
+
+async def _processar_mensagem_lote(corridas: List[dict], descartadas: int):
+    # Mensagens publicadas por POST /corridas/batch já chegam agrupadas e
+    # são gravadas direto, sem passar pelo agrupador.
+    if not corridas:
+        metrics.CONSUMER_MENSAGENS_INVALIDAS.inc()
+        raise RejectMessage()
+
+    logger.info(
+        "Processando mensagem com %d corridas (%d inválidas)", len(corridas), descartadas,
+        extra={"evento": "mensagem_lote_recebida"}
+    )
+    chaves = [chave for corrida in corridas for chave in _chaves_corrida(corrida)]
     try:
-        corrida_data = _safe_parse_message(message)
-    except json.JSONDecodeError as e:
-        logger.error(f"Erro ao decodificar mensagem JSON: {e}")
-        return
+        async with faixas.faixa(chaves) as espera:
+            metrics.CONSUMER_ESPERA_FAIXA.observe(espera)
+            await _processar_lote(corridas)
     except Exception as e:
-        logger.error(f"Mensagem inválida: {e}")
-        return
+        logger.error(
+            "Mensagem com %d corridas falhou, devolvendo à fila: %s", len(corridas), e,
+            extra={"evento": "mensagem_lote_falhou"}
+        )
+        raise NackMessage()
 
-    id_corrida = corrida_data.get("id_corrida")
-    motorista_nome = (corrida_data.get("motorista") or {}).get("nome")
-    raw_valor = corrida_data.get("valor_corrida")
+    metrics.CONSUMER_MENSAGENS_OK.inc()
 
-    if not id_corrida or not motorista_nome or raw_valor is None:
-        logger.error("Mensagem incompleta: precisa de id_corrida, motorista.nome e valor_corrida.")
-        return
+async def _tratar_mensagem(corpo: bytes):
+    # Mensagens que não passam na validação de Corrida são rejeitadas (sem
+    # requeue) com os motivos no log; num lote, só os itens inválidos são
+    # descartados.
     try:
-        valor_corrida = float(raw_valor)
-    except (ValueError, TypeError):
-        logger.error(f"valor_corrida inválido: {raw_valor}")
-        return
+        if eh_lote(corpo):
+            corridas, motivos = decodificar_lote(corpo)
+            descartadas = len({motivo["indice"] for motivo in motivos})
+            if descartadas:
+                logger.warning(
+                    "Corridas inválidas descartadas do lote: %d", descartadas,
+                    extra={"evento": "mensagem_invalida", "motivos": motivos}
+                )
+            await _processar_mensagem_lote(corridas, descartadas)
+            return
 
-    logger.info(f"Processando corrida {id_corrida} - Motorista: {motorista_nome} - Valor: R$ {valor_corrida:.2f}")
+        corrida_data = decodificar_corrida(corpo)
+    except MensagemInvalida as e:
+        metrics.CONSUMER_MENSAGENS_INVALIDAS.inc()
+        logger.error(
+            "Mensagem rejeitada: %s", e,
+            extra={"evento": "mensagem_invalida", "motivos": e.motivos}
+        )
+        raise RejectMessage()
+
+    id_corrida = corrida_data["id_corrida"]
+    logger.info(
+        "Processando corrida %s - Motorista: %s - Valor: R$ %.2f",
+        id_corrida, corrida_data["motorista"]["nome"], corrida_data["valor_corrida"],
+        extra={"evento": "corrida_recebida", "id_corrida": id_corrida}
+    )
+
+    if agrupador is not None:
+        # A faixa só garante a ordem de entrada no agrupador; a espera pelo
+        # lote acontece fora dela para não travar o motorista até o flush.
+        async with faixas.faixa(_chaves_corrida(corrida_data)) as espera:
+            metrics.CONSUMER_ESPERA_FAIXA.observe(espera)
+            confirmacao = agrupador.enfileirar(corrida_data)
+        try:
+            await confirmacao
+        except Exception as e:
+            logger.error(
+                "Lote da corrida %s falhou, devolvendo à fila: %s", id_corrida, e,
+                extra={"evento": "corrida_falhou", "id_corrida": id_corrida}
+            )
+            raise NackMessage()
+    else:
+        try:
+            async with faixas.faixa(_chaves_corrida(corrida_data)) as espera:
+                metrics.CONSUMER_ESPERA_FAIXA.observe(espera)
+                await _processar_lote([corrida_data])
+        except Exception as e:
+            # Mesmo tratamento do modo em lote: a mensagem volta à fila. O
+            # upsert e o crédito com marcador de corrida tornam a reentrega segura.
+            logger.exception(
+                "Erro ao registrar corrida %s, devolvendo à fila: %s", id_corrida, e,
+                extra={"evento": "corrida_falhou", "id_corrida": id_corrida}
+            )
+            raise NackMessage()
+
+    metrics.CONSUMER_MENSAGENS_OK.inc()
+    logger.info(
+        "Corrida %s processada com sucesso.", id_corrida,
+        extra={"evento": "corrida_processada", "id_corrida": id_corrida}
+    )
+
+async def _corpo_bruto(msg: RabbitMessage) -> bytes:
+    # Entrega os bytes da mensagem sem o json.loads do FastStream; a
+    # decodificação e a validação acontecem juntas em _tratar_mensagem.
+    return msg.body
+
+async def processar_corrida_finalizada(corpo: Any, msg: RabbitMessage):
+    inicio = time.perf_counter()
+    if getattr(msg.raw_message, "redelivered", False):
+        metrics.CONSUMER_REENTREGAS.inc()
 
     try:
-        saldo_key = f"saldo:{motorista_nome}"
-        novo_saldo = await redis_client.incrbyfloat(saldo_key, valor_corrida)
-        novo_saldo = float(novo_saldo)
-        logger.info(f"Saldo atualizado para {motorista_nome}: R$ {novo_saldo:.2f}")
-    except Exception as e:
-        logger.exception(f"Erro ao atualizar saldo no Redis: {e}")
-    try:
-        await _ensure_datetime_field(corrida_data)
-        result = await mongo_collection.update_one(
-            {"id_corrida": id_corrida},
-            {"$set": corrida_data},
-            upsert=True
+        await _tratar_mensagem(corpo)
+    except NackMessage:
+        metrics.CONSUMER_MENSAGENS_FALHAS.inc()
+        raise
+    finally:
+        metrics.CONSUMER_MENSAGEM_LATENCIA.observe(time.perf_counter() - inicio)
+
+PARTICOES = particoes_do_consumidor()
+
+# Uma assinatura por partição atribuída a esta instância.
+for particao in PARTICOES:
+    processar_corrida_finalizada = broker.subscriber(
+        fila_rabbit(QUEUE_NAME, particao),
+        decoder=_corpo_bruto
+    )(processar_corrida_finalizada)
+
+async def configurar(cliente_mongo, cliente_redis):
+    # Prepara índices, script de crédito e agrupador sobre clientes já
+    # conectados. Os benchmarks chamam esta função com bancos locais.
+    global mongo_client, mongo_collection, rollups_collection, redis_client, agrupador, creditar_saldo
+    global tarefa_metricas
+
+    mongo_client = cliente_mongo
+    db = mongo_client[MONGO_DB]
+    mongo_collection = db[MONGO_COLLECTION]
+    await criar_indices_corridas(mongo_collection)
+    rollups_collection = db[COLECAO_ROLLUPS]
+    await criar_indices(rollups_collection, INDICES_ROLLUPS)
+
+    redis_client = cliente_redis
+    creditar_saldo = redis_client.register_script(SCRIPT_CREDITO)
+    await redis_client.script_load(SCRIPT_CREDITO)
+
+    if CONSUMER_BATCH_SIZE > 1:
+        agrupador = AgrupadorLote(
+            _processar_lote,
+            CONSUMER_BATCH_SIZE,
+            CONSUMER_BATCH_TIMEOUT_MS,
+            nome="lote de corridas"
         )
-        if result.upserted_id:
-            logger.info(f"Corrida {id_corrida} registrada (upsert).")
-        else:
-            logger.info(f"Corrida {id_corrida} atualizada.")
-    except Exception as e:
-        logger.exception(f"Erro ao registrar/atualizar corrida no MongoDB: {e}")
-        return
+        agrupador.iniciar()
+        logger.info(
+            f"Modo em lote: até {CONSUMER_BATCH_SIZE} mensagens ou {CONSUMER_BATCH_TIMEOUT_MS:.0f} ms"
+        )
+
+    metrics.CONSUMER_EM_ANDAMENTO.set_function(lambda: faixas.em_andamento)
+    metrics.CONSUMER_FAIXAS_ATIVAS.set_function(lambda: faixas.faixas_ativas)
+    metrics.CONSUMER_LOTE_PENDENTES.set_function(lambda: agrupador.pendentes if agrupador else 0)
 
-    logger.info(f"Corrida {id_corrida} processada com sucesso.")
+    if CONSUMER_METRICS_LOG_INTERVAL > 0:
+        tarefa_metricas = asyncio.create_task(_registrar_metricas())
+    logger.info(f"Concorrência: até {CONSUMER_CONCURRENCY} mensagens, prefetch {CONSUMER_PREFETCH}")
 
 @app.on_startup
 async def on_startup():
-    global mongo_client, mongo_collection, redis_client
     logger.info("Inicializando consumer...")
 
+    if CONSUMER_METRICS_PORT > 0:
+        metrics.iniciar_servidor(CONSUMER_METRICS_PORT)
+
     try:
-        mongo_client = AsyncIOMotorClient(MONGO_URI)
-        db = mongo_client[MONGO_DB]
-        mongo_collection = db[MONGO_COLLECTION]
-        await mongo_client.server_info()
+        cliente_mongo = AsyncIOMotorClient(MONGO_URI)
+        await cliente_mongo.server_info()
         logger.info(f"Conectado ao MongoDB em {MONGO_URI}, DB: {MONGO_DB}, coll: {MONGO_COLLECTION}")
     except Exception as e:
         logger.exception(f"Erro ao conectar no MongoDB: {e}")
         raise
 
     try:
-        redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
-        await redis_client.ping()
+        cliente_redis = aioredis.from_url(REDIS_URL, decode_responses=True)
+        await cliente_redis.ping()
         logger.info(f"Conectado ao Redis em {REDIS_URL}")
     except Exception as e:
         logger.exception(f"Erro ao conectar no Redis: {e}")
         raise
 
-    logger.info(f"Consumer pronto e escutando fila: {QUEUE_NAME}")
+    await configurar(cliente_mongo, cliente_redis)
+
+@app.after_startup
+async def after_startup():
+    # As filas só existem depois que o broker assina as partições.
+    global tarefa_filas
+    if CONSUMER_QUEUE_DEPTH_INTERVAL > 0:
+        tarefa_filas = asyncio.create_task(_amostrar_filas())
+
+    if RABBITMQ_PARTITIONS > 1:
+        logger.info(
+            f"Consumer pronto e escutando partições {PARTICOES} "
+            f"de {RABBITMQ_PARTITIONS} da fila {QUEUE_NAME}"
+        )
+    else:
+        logger.info(f"Consumer pronto e escutando fila: {QUEUE_NAME}")
 
 @app.on_shutdown
 async def on_shutdown():
-    global mongo_client, redis_client
+    global mongo_client, redis_client, agrupador, tarefa_metricas, tarefa_filas
     logger.info("Encerrando consumer...")
 
+    for tarefa in (tarefa_metricas, tarefa_filas):
+        if tarefa is not None:
+            tarefa.cancel()
+    tarefa_metricas = tarefa_filas = None
+
+    if agrupador is not None:
+        await agrupador.parar()
+        agrupador = None
+
     try:
         if redis_client:
             await redis_client.close()
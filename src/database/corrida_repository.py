@@ -0,0 +1,132 @@
+import os
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+from src.database.mongo_client import get_corridas_collection
+from src.database.indices import COLLATION_PAGAMENTO, estatisticas_indices
+from src.database.paginacao import codificar_cursor, filtro_apos_cursor
+from src.serializacao import PROJECAO_CORRIDA
+
+logger = logging.getLogger(__name__)
+
+CURSOR_BATCH_SIZE = int(os.getenv("MONGO_CURSOR_BATCH_SIZE", "500"))
+ORDENACAO_CORRIDAS = [("data_criacao", DESCENDING), ("id_corrida", DESCENDING)]
+
+class CorridaRepository:
+    def __init__(self, collection=None):
+        self._collection = collection
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_corridas_collection()
+        return self._collection
+
+    def _buscar(self, filtro: dict, after: Optional[str], limite: Optional[int]):
+        collation = COLLATION_PAGAMENTO if "forma_pagamento" in filtro else None
+        if after:
+            apos = filtro_apos_cursor(after)
+            filtro = {"$and": [filtro, apos]} if filtro else apos
+
+        cursor = (
+            self.collection.find(filtro, PROJECAO_CORRIDA, collation=collation)
+            .sort(ORDENACAO_CORRIDAS)
+            .batch_size(CURSOR_BATCH_SIZE)
+        )
+        if limite:
+            cursor = cursor.limit(limite)
+        return cursor
+
+    async def _pagina(
+        self, filtro: dict, limite: int, after: Optional[str]
+    ) -> Tuple[List[dict], Optional[str]]:
+        # Busca um documento a mais para saber se existe próxima página.
+        corridas = await self._buscar(filtro, after, limite + 1).to_list(length=limite + 1)
+
+        proximo_cursor = None
+        if len(corridas) > limite:
+            corridas = corridas[:limite]
+            proximo_cursor = codificar_cursor(corridas[-1])
+
+        return corridas, proximo_cursor
+
+    async def listar(
+        self, limite: int, after: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        return await self._pagina({}, limite, after)
+
+    async def filtrar_por_pagamento(
+        self, forma_pagamento: str, limite: int, after: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        return await self._pagina(self._filtro_pagamento(forma_pagamento), limite, after)
+
+    async def iterar(
+        self,
+        forma_pagamento: Optional[str] = None,
+        limite: Optional[int] = None,
+        after: Optional[str] = None
+    ) -> AsyncIterator[List[dict]]:
+        filtro = self._filtro_pagamento(forma_pagamento) if forma_pagamento else {}
+        lote = []
+
+        async for corrida in self._buscar(filtro, after, limite):
+            lote.append(corrida)
+            if len(lote) >= CURSOR_BATCH_SIZE:
+                yield lote
+                lote = []
+
+        if lote:
+            yield lote
+
+    async def iterar_periodo(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        tamanho_lote: int = CURSOR_BATCH_SIZE
+    ) -> AsyncIterator[List[dict]]:
+        # Corridas com desde <= data_criacao < ate, das mais antigas para as
+        # mais novas, em lotes do tamanho do batch do cursor. Percorre o
+        # índice data_criacao_id_corrida no sentido inverso.
+        periodo = {}
+        if desde is not None:
+            periodo["$gte"] = desde
+        if ate is not None:
+            periodo["$lt"] = ate
+        filtro = {"data_criacao": periodo} if periodo else {}
+
+        cursor = (
+            self.collection.find(filtro, PROJECAO_CORRIDA)
+            .sort([("data_criacao", ASCENDING), ("id_corrida", ASCENDING)])
+            .batch_size(tamanho_lote)
+        )
+        lote = []
+        async for corrida in cursor:
+            lote.append(corrida)
+            if len(lote) >= tamanho_lote:
+                yield lote
+                lote = []
+
+        if lote:
+            yield lote
+
+    def _filtro_pagamento(self, forma_pagamento: str) -> dict:
+        return {"forma_pagamento": forma_pagamento}
+
+    async def buscar_por_id(self, id_corrida: str) -> Optional[dict]:
+        # Usa o índice único id_corrida_unico.
+        return await self.collection.find_one({"id_corrida": id_corrida}, PROJECAO_CORRIDA)
+
+    async def deletar(self, id_corrida: str) -> Optional[dict]:
+        # Devolve a corrida removida, para descontá-la dos rollups.
+        return await self.collection.find_one_and_delete({"id_corrida": id_corrida})
+
+    async def estatisticas_indices(self) -> List[dict]:
+        return await estatisticas_indices(self.collection)
+
+corrida_repository = CorridaRepository()
+
+def get_corrida_repository() -> CorridaRepository:
+    return corrida_repository
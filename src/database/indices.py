@@ -0,0 +1,64 @@
+import logging
+from typing import List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.collation import Collation
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Comparação sem diferenciar maiúsculas/minúsculas ("Pix" == "pix" == "PIX").
+# A consulta por forma de pagamento precisa usar exatamente esta collation
+# para que o MongoDB escolha o índice abaixo.
+COLLATION_PAGAMENTO = Collation(locale="pt", strength=2)
+
+INDICES_CORRIDAS = [
+    IndexModel(
+        [("id_corrida", ASCENDING)],
+        name="id_corrida_unico",
+        unique=True
+    ),
+    IndexModel(
+        [("data_criacao", DESCENDING), ("id_corrida", DESCENDING)],
+        name="data_criacao_id_corrida"
+    ),
+    IndexModel(
+        [
+            ("forma_pagamento", ASCENDING),
+            ("data_criacao", DESCENDING),
+            ("id_corrida", DESCENDING),
+        ],
+        name="forma_pagamento_data_criacao_ci",
+        collation=COLLATION_PAGAMENTO
+    ),
+]
+
+async def criar_indices(collection, indices: List[IndexModel]) -> List[str]:
+    criados = []
+    for indice in indices:
+        nome = indice.document["name"]
+        try:
+            await collection.create_indexes([indice])
+            criados.append(nome)
+        except OperationFailure as e:
+            logger.error(f"Erro ao criar índice {nome} em {collection.name}: {e}")
+
+    logger.info(f"Índices garantidos em {collection.name}: {', '.join(criados) or 'nenhum'}")
+    return criados
+
+async def criar_indices_corridas(collection) -> List[str]:
+    return await criar_indices(collection, INDICES_CORRIDAS)
+
+async def estatisticas_indices(collection) -> List[dict]:
+    estatisticas = []
+    async for indice in collection.aggregate([{"$indexStats": {}}]):
+        acessos = indice.get("accesses", {})
+        since = acessos.get("since")
+        estatisticas.append({
+            "nome": indice.get("name"),
+            "chave": dict(indice.get("key", {})),
+            "host": indice.get("host"),
+            "operacoes": int(acessos.get("ops", 0)),
+            "desde": since.isoformat() if since else None,
+        })
+    return estatisticas
@@ -0,0 +1,198 @@
+# Migra os saldos do formato "saldo:{motorista}" (reais em string) para os
+# hashes "saldos:{bucket}" em centavos e compara o uso de memória.
+#
+#   python -m src.database.migrar_saldos [--remover-antigas] [--lote 1000]
+#
+# Rode com o consumer parado e depois suba API e consumer com SALDO_STORAGE=hash.
+# Quem continua com SALDO_STORAGE=string roda com --string antes de subir o
+# consumer novo, que credita saldo:{nome minúsculo}: as chaves com outras
+# maiúsculas são somadas nela.
+# --remover-antigas apaga só as chaves migradas; as que não puderam ser lidas
+# como saldo ficam no Redis e são listadas no relatório.
+import argparse
+import logging
+
+from src.logging_config import configurar_logging
+from src.database.redis_client import get_redis_client
+from src.database.saldo_layout import (
+    PREFIXO_SALDO,
+    SALDO_HASH_BUCKETS,
+    bucket_saldo,
+    chave_saldo,
+    de_centavos,
+    para_centavos,
+)
+
+logger = logging.getLogger("migrar_saldos")
+
+def _ler_lote(
+    client, chaves: list, destino, totais: dict, origens: dict, ignoradas: list
+) -> int:
+    pipe = client.pipeline(transaction=False)
+    for chave in chaves:
+        pipe.get(chave)
+        pipe.memory_usage(chave)
+    # Uma chave saldo:* de outro tipo responde WRONGTYPE ao GET; ela é
+    # ignorada em vez de interromper a migração.
+    respostas = pipe.execute(raise_on_error=False)
+
+    memoria = 0
+    for chave, valor, uso in zip(chaves, respostas[0::2], respostas[1::2]):
+        if valor is None:
+            continue
+        try:
+            centavos = para_centavos(float(valor))
+        except (TypeError, ValueError):
+            logger.warning(f"Saldo inválido em {chave}: {valor!r}, ignorado")
+            ignoradas.append(chave)
+            continue
+
+        alvo = destino(chave[len(PREFIXO_SALDO):])
+        totais[alvo] = totais.get(alvo, 0) + centavos
+        origens.setdefault(alvo, []).append(chave)
+        memoria += uso if isinstance(uso, int) else 0
+    return memoria
+
+def _ler_saldos(client, destino, tamanho_lote: int) -> tuple[dict, dict, list, int]:
+    # O consumer original creditava "saldo:{nome}" com o nome como veio na
+    # corrida, e a API usava "saldo:{nome minúsculo}": o mesmo motorista pode
+    # ter várias chaves. destino() leva todas ao mesmo lugar e os saldos são
+    # somados antes de qualquer gravação.
+    totais: dict = {}
+    origens: dict = {}
+    ignoradas: list = []
+    memoria = 0
+    lote = []
+
+    for chave in client.scan_iter(match=f"{PREFIXO_SALDO}*", count=tamanho_lote):
+        lote.append(chave)
+        if len(lote) >= tamanho_lote:
+            memoria += _ler_lote(client, lote, destino, totais, origens, ignoradas)
+            lote = []
+    if lote:
+        memoria += _ler_lote(client, lote, destino, totais, origens, ignoradas)
+
+    return totais, origens, ignoradas, memoria
+
+def _em_lotes(itens: list, tamanho_lote: int):
+    for inicio in range(0, len(itens), tamanho_lote):
+        yield itens[inicio:inicio + tamanho_lote]
+
+def _memoria_buckets(client, buckets: set) -> int:
+    pipe = client.pipeline(transaction=False)
+    for bucket in buckets:
+        pipe.memory_usage(bucket)
+    return sum(uso or 0 for uso in pipe.execute())
+
+def migrar(remover_antigas: bool = False, tamanho_lote: int = 1000) -> dict:
+    client = get_redis_client()
+    totais, origens, ignoradas, memoria_antes = _ler_saldos(client, bucket_saldo, tamanho_lote)
+
+    # HSET com o total de cada motorista: rodar a migração de novo grava os
+    # mesmos valores em vez de somá-los outra vez.
+    buckets = {bucket for bucket, _ in totais}
+    for lote in _em_lotes(list(totais.items()), tamanho_lote):
+        pipe = client.pipeline(transaction=False)
+        for (bucket, campo), centavos in lote:
+            pipe.hset(bucket, campo, centavos)
+        pipe.execute()
+
+    migradas = [chave for chaves in origens.values() for chave in chaves]
+    if remover_antigas:
+        for lote in _em_lotes(migradas, tamanho_lote):
+            client.unlink(*lote)
+
+    memoria_depois = _memoria_buckets(client, buckets)
+    encodings = {}
+    for bucket in list(buckets)[:100]:
+        encoding = client.object("encoding", bucket)
+        encodings[encoding] = encodings.get(encoding, 0) + 1
+
+    relatorio = {
+        "saldos_migrados": len(migradas),
+        "motoristas": len(totais),
+        "buckets": len(buckets),
+        "buckets_configurados": SALDO_HASH_BUCKETS,
+        "memoria_chaves_antigas_bytes": memoria_antes,
+        "memoria_buckets_bytes": memoria_depois,
+        "economia_percentual": (
+            round(100 * (1 - memoria_depois / memoria_antes), 1) if memoria_antes else 0.0
+        ),
+        "encodings_amostra": encodings,
+        "chaves_antigas_removidas": remover_antigas,
+        "chaves_ignoradas": ignoradas,
+    }
+    return relatorio
+
+def unificar_string(tamanho_lote: int = 1000) -> dict:
+    # Para quem continua com SALDO_STORAGE=string: API e consumer creditam
+    # "saldo:{nome minúsculo}", então as variações de maiúsculas deixadas pelo
+    # consumer original são somadas nessa chave e apagadas. SET e UNLINK vão
+    # na mesma transação, para que rodar de novo não some duas vezes.
+    client = get_redis_client()
+    totais, origens, ignoradas, _ = _ler_saldos(client, chave_saldo, tamanho_lote)
+
+    variacoes = [
+        (destino, [chave for chave in chaves if chave != destino])
+        for destino, chaves in origens.items()
+        if any(chave != destino for chave in chaves)
+    ]
+    for lote in _em_lotes(variacoes, tamanho_lote):
+        pipe = client.pipeline(transaction=True)
+        for destino, chaves in lote:
+            pipe.set(destino, de_centavos(totais[destino]))
+            pipe.unlink(*chaves)
+        pipe.execute()
+
+    return {
+        "motoristas": len(totais),
+        "motoristas_unificados": len(variacoes),
+        "chaves_removidas": sum(len(chaves) for _, chaves in variacoes),
+        "chaves_ignoradas": ignoradas,
+    }
+
+def _avisar_ignoradas(relatorio: dict):
+    if relatorio["chaves_ignoradas"]:
+        logger.warning(
+            f"{len(relatorio['chaves_ignoradas'])} chaves não migradas e mantidas: "
+            f"{', '.join(relatorio['chaves_ignoradas'])}"
+        )
+
+def main():
+    configurar_logging("migrar_saldos")
+    parser = argparse.ArgumentParser(
+        description="Migra saldos saldo:{motorista} para hashes em centavos"
+    )
+    parser.add_argument("--remover-antigas", action="store_true",
+                        help="apaga as chaves saldo:* migradas")
+    parser.add_argument("--string", action="store_true",
+                        help="mantém o formato string e só junta as variações de "
+                             "maiúsculas em saldo:{nome minúsculo}")
+    parser.add_argument("--lote", type=int, default=1000,
+                        help="chaves lidas por SCAN/pipeline")
+    args = parser.parse_args()
+
+    if args.string:
+        relatorio = unificar_string(args.lote)
+        logger.info(
+            f"{relatorio['motoristas_unificados']} de {relatorio['motoristas']} motoristas "
+            f"unificados, {relatorio['chaves_removidas']} chaves removidas"
+        )
+        _avisar_ignoradas(relatorio)
+        return
+
+    relatorio = migrar(args.remover_antigas, args.lote)
+    logger.info(
+        f"{relatorio['saldos_migrados']} saldos de {relatorio['motoristas']} motoristas "
+        f"migrados para {relatorio['buckets']} buckets"
+    )
+    logger.info(
+        f"MEMORY USAGE: {relatorio['memoria_chaves_antigas_bytes']} bytes (saldo:*) -> "
+        f"{relatorio['memoria_buckets_bytes']} bytes (saldos:*), "
+        f"economia de {relatorio['economia_percentual']}%"
+    )
+    logger.info(f"Codificação dos buckets (amostra): {relatorio['encodings_amostra']}")
+    _avisar_ignoradas(relatorio)
+
+if __name__ == "__main__":
+    main()
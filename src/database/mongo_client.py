@@ -1,55 +1,70 @@
 import os
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure
 from typing import Optional
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# O cliente é criado no primeiro uso e pertence ao processo que o criou:
+# um worker que herdou o singleton por fork cria o seu próprio em vez de
+# reaproveitar os sockets e threads do pai.
 class MongoDBClient:
     _instance: Optional['MongoDBClient'] = None
-    _client: Optional[MongoClient] = None
+    _client: Optional[AsyncIOMotorClient] = None
     _db = None
+    _pid: Optional[int] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        if self._client is None:
-            self.connect()
-
     def connect(self):
         try:
             mongo_host = os.getenv("MONGO_HOST", "localhost")
             mongo_port = int(os.getenv("MONGO_PORT", "27017"))
             mongo_db = os.getenv("MONGO_DB", "transflow")
+            max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+            min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
 
             connection_string = f"mongodb://{mongo_host}:{mongo_port}/"
 
-            self._client = MongoClient(
+            self._client = AsyncIOMotorClient(
                 connection_string,
+                maxPoolSize=max_pool_size,
+                minPoolSize=min_pool_size,
                 serverSelectionTimeoutMS=5000,
                 connectTimeoutMS=10000
             )
 
-            self._client.admin.command("ping")
-
             self._db = self._client[mongo_db]
+            self._pid = os.getpid()
 
-            logger.info(f"MongoDB conectado: {mongo_host}:{mongo_port}/{mongo_db}")
+            logger.info(
+                f"MongoDB configurado: {mongo_host}:{mongo_port}/{mongo_db} "
+                f"(pool {min_pool_size}-{max_pool_size})"
+            )
 
+        except Exception as e:
+            logger.error(f"Erro inesperado ao configurar o MongoDB: {e}")
+            raise
+
+    async def ping(self):
+        try:
+            await self.get_database().client.admin.command("ping")
         except ConnectionFailure as e:
             logger.error(f"Falha ao conectar ao MongoDB: {e}")
             raise
-        except Exception as e:
-            logger.error(f"Erro inesperado ao conectar ao MongoDB: {e}")
-            raise
+
+    def usar(self, client: AsyncIOMotorClient, nome_banco: str):
+        # Substitui o cliente por um já criado (benchmarks).
+        self._client = client
+        self._db = client[nome_banco]
+        self._pid = os.getpid()
 
     def get_database(self):
-        if self._db is None:
+        if self._db is None or self._pid != os.getpid():
             self.connect()
         return self._db
 
@@ -60,6 +75,9 @@ class MongoDBClient:
     def close(self):
         if self._client:
             self._client.close()
+            self._client = None
+            self._db = None
+            self._pid = None
             logger.info("Conexão com MongoDB encerrada.")
 
 mongo_client = MongoDBClient()
@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+class CursorInvalido(ValueError):
+    pass
+
+def codificar_cursor(documento: dict) -> str:
+    data_criacao = documento.get("data_criacao")
+    if isinstance(data_criacao, datetime):
+        data_criacao = data_criacao.isoformat()
+
+    payload = json.dumps(
+        {"d": data_criacao, "i": documento["id_corrida"]},
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decodificar_cursor(cursor: str) -> tuple[Optional[datetime], str]:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        id_corrida = payload["i"]
+        data_criacao = payload.get("d")
+        if data_criacao is not None:
+            data_criacao = datetime.fromisoformat(data_criacao)
+    except Exception as e:
+        raise CursorInvalido(f"Cursor inválido: {cursor}") from e
+
+    if not isinstance(id_corrida, str):
+        raise CursorInvalido(f"Cursor inválido: {cursor}")
+
+    return data_criacao, id_corrida
+
+def filtro_apos_cursor(cursor: str) -> dict:
+    # A listagem é ordenada por (data_criacao, id_corrida) decrescente;
+    # documentos sem data_criacao ficam no fim da ordenação.
+    data_criacao, id_corrida = decodificar_cursor(cursor)
+
+    if data_criacao is None:
+        return {"data_criacao": None, "id_corrida": {"$lt": id_corrida}}
+
+    return {
+        "$or": [
+            {"data_criacao": {"$lt": data_criacao}},
+            {"data_criacao": data_criacao, "id_corrida": {"$lt": id_corrida}},
+            {"data_criacao": None},
+        ]
+    }
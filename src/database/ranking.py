@@ -0,0 +1,45 @@
+import os
+from datetime import date, datetime
+from typing import List, Optional
+
+from src.database.saldo_layout import de_centavos, normalizar_motorista
+
+# Sorted sets com o faturamento acumulado (em centavos) de cada motorista,
+# atualizados pelo consumer no mesmo script Lua do crédito de saldo.
+CHAVE_RANKING = "ranking:motoristas"
+RANKING_DIARIO_ENABLED = os.getenv("RANKING_DIARIO_ENABLED", "true").lower() in ("1", "true", "yes")
+RANKING_DIARIO_TTL_SECONDS = int(os.getenv("RANKING_DIARIO_TTL_SECONDS", str(8 * 86400)))
+
+def chave_ranking(dia: Optional[date] = None) -> str:
+    if dia is None:
+        return CHAVE_RANKING
+    return f"{CHAVE_RANKING}:{dia.isoformat()}"
+
+def chaves_ranking_corrida(data_criacao: datetime) -> List[str]:
+    chaves = [chave_ranking()]
+    if RANKING_DIARIO_ENABLED:
+        chaves.append(chave_ranking(data_criacao.date()))
+    return chaves
+
+def _decodificar(valor) -> str:
+    return valor.decode("utf-8") if isinstance(valor, bytes) else valor
+
+async def top_motoristas(client, top: int, dia: Optional[date] = None) -> List[dict]:
+    itens = await client.zrevrange(chave_ranking(dia), 0, top - 1, withscores=True)
+    return [
+        {"posicao": posicao, "motorista": _decodificar(motorista), "total": de_centavos(pontos)}
+        for posicao, (motorista, pontos) in enumerate(itens, start=1)
+    ]
+
+async def posicao_motorista(client, motorista: str, dia: Optional[date] = None) -> Optional[dict]:
+    chave = chave_ranking(dia)
+    membro = normalizar_motorista(motorista)
+
+    pipe = client.pipeline(transaction=False)
+    pipe.zrevrank(chave, membro)
+    pipe.zscore(chave, membro)
+    posicao, pontos = await pipe.execute()
+
+    if posicao is None:
+        return None
+    return {"posicao": posicao + 1, "motorista": membro, "total": de_centavos(pontos)}
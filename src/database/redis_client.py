@@ -1,25 +1,33 @@
 import os
 import redis
+import redis.asyncio as aioredis
 from redis.exceptions import ConnectionError, RedisError
 from typing import Optional
 import logging
 
-logging.basicConfig(level=logging.INFO)
+from src.database.saldo_layout import (
+    bucket_saldo,
+    chave_saldo,
+    de_centavos,
+    para_centavos,
+    usa_hash,
+)
+
 logger = logging.getLogger(__name__)
 
+# Os clientes síncrono e assíncrono são criados no primeiro uso, não na
+# importação, e só valem no processo que os criou: depois de um fork o
+# worker abre as próprias conexões.
 class RedisClient:
     _instance: Optional['RedisClient'] = None
     _client: Optional[redis.Redis] = None
+    _pid: Optional[int] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        if self._client is None:
-            self.connect()
-
     def connect(self):
         try:
             redis_host = os.getenv("REDIS_HOST", "localhost")
@@ -34,6 +42,7 @@ class RedisClient:
             )
 
             self._client.ping()
+            self._pid = os.getpid()
             logger.info(f"Conectado ao Redis em {redis_host}:{redis_port}")
 
         except ConnectionError as e:
@@ -44,20 +53,19 @@ class RedisClient:
             raise
 
     def get_client(self) -> redis.Redis:
-        if self._client is None:
+        if self._client is None or self._pid != os.getpid():
             self.connect()
         return self._client
 
     def get_saldo(self, motorista: str) -> float:
         try:
-            key = f"saldo:{motorista.lower()}"
-            saldo = self._client.get(key)
+            if usa_hash():
+                bucket, campo = bucket_saldo(motorista)
+                centavos = self.get_client().hget(bucket, campo)
+                return de_centavos(centavos) if centavos is not None else 0.0
 
-            if saldo is None:
-                self._client.set(key, "0.0")
-                return 0.0
-
-            return float(saldo)
+            saldo = self.get_client().get(chave_saldo(motorista))
+            return float(saldo) if saldo is not None else 0.0
 
         except RedisError as e:
             logger.error(f"Erro ao obter saldo: {e}")
@@ -65,55 +73,51 @@ class RedisClient:
 
     def set_saldo(self, motorista: str, valor: float) -> bool:
         try:
-            key = f"saldo:{motorista.lower()}"
-            self._client.set(key, str(valor))
-            logger.info(f"Saldo de {motorista} definido para R$ {valor:.2f}")
+            if usa_hash():
+                bucket, campo = bucket_saldo(motorista)
+                self.get_client().hset(bucket, campo, para_centavos(valor))
+            else:
+                self.get_client().set(chave_saldo(motorista), str(valor))
+            logger.info(
+                "Saldo de %s definido para R$ %.2f", motorista, valor,
+                extra={"evento": "saldo_definido"}
+            )
             return True
 
         except RedisError as e:
             logger.error(f"Erro ao definir saldo: {e}")
             raise
 
-    def incrementar_saldo(self, motorista: str, valor: float) -> float:
+    def inicializar_saldo(self, motorista: str) -> bool:
         try:
-            key = f"saldo:{motorista.lower()}"
-            pipe = self._client.pipeline()
-            max_tentativas = 10
-
-            for tentativa in range(max_tentativas):
-                try:
-                    pipe.watch(key)
-
-                    saldo_atual = pipe.get(key)
-                    saldo_atual = float(saldo_atual) if saldo_atual else 0.0
-
-                    novo_saldo = saldo_atual + valor
-
-                    pipe.multi()
-                    pipe.set(key, str(novo_saldo))
-                    pipe.execute()
+            if usa_hash():
+                bucket, campo = bucket_saldo(motorista)
+                return bool(self.get_client().hsetnx(bucket, campo, 0))
+            return bool(self.get_client().setnx(chave_saldo(motorista), "0.0"))
 
-                    logger.info(
-                        f"Saldo de {motorista} atualizado: "
-                        f"R$ {saldo_atual:.2f} → R$ {novo_saldo:.2f} "
-                        f"(+R$ {valor:.2f})"
-                    )
-
-                    return novo_saldo
-
-                except redis.WatchError:
-                    logger.warning(
-                        f"Tentativa {tentativa + 1}/{max_tentativas}: conflito ao atualizar saldo"
-                    )
-                    continue
-
-                finally:
-                    pipe.reset()
+        except RedisError as e:
+            logger.error(f"Erro ao inicializar saldo: {e}")
+            raise
 
-            raise Exception(
-                f"Falha ao atualizar saldo após {max_tentativas} tentativas"
+    def incrementar_saldo(self, motorista: str, valor: float) -> float:
+        # HINCRBY/INCRBYFLOAT são atômicos no servidor: não há corrida entre
+        # leitura e escrita, então não é preciso WATCH/MULTI nem novas tentativas.
+        try:
+            if usa_hash():
+                bucket, campo = bucket_saldo(motorista)
+                novo_saldo = de_centavos(
+                    self.get_client().hincrby(bucket, campo, para_centavos(valor))
+                )
+            else:
+                novo_saldo = float(self.get_client().incrbyfloat(chave_saldo(motorista), valor))
+
+            logger.info(
+                "Saldo de %s atualizado: R$ %.2f (+R$ %.2f)", motorista, novo_saldo, valor,
+                extra={"evento": "saldo_incrementado"}
             )
 
+            return novo_saldo
+
         except RedisError as e:
             logger.error(f"Erro ao incrementar saldo: {e}")
             raise
@@ -125,8 +129,42 @@ class RedisClient:
                 logger.info("Conexão Redis fechada")
             except Exception:
                 pass
+            self._client = None
+            self._pid = None
 
 redis_client = RedisClient()
 
+_async_client: Optional[aioredis.Redis] = None
+_async_pid: Optional[int] = None
+
+def get_async_redis_client() -> aioredis.Redis:
+    # Cliente assíncrono usado pelos endpoints; respostas em bytes.
+    global _async_client, _async_pid
+    if _async_client is None or _async_pid != os.getpid():
+        pool = aioredis.BlockingConnectionPool(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "100")),
+            timeout=5,
+            socket_connect_timeout=5,
+            socket_timeout=5
+        )
+        _async_client = aioredis.Redis(connection_pool=pool)
+        _async_pid = os.getpid()
+    return _async_client
+
+def usar_async_redis_client(client: aioredis.Redis):
+    # Substitui o cliente assíncrono por um já criado (benchmarks).
+    global _async_client, _async_pid
+    _async_client = client
+    _async_pid = os.getpid()
+
+async def close_async_redis_client():
+    global _async_client, _async_pid
+    if _async_client is not None and _async_pid == os.getpid():
+        await _async_client.close(close_connection_pool=True)
+    _async_client = None
+    _async_pid = None
+
 def get_redis_client() -> redis.Redis:
     return redis_client.get_client()
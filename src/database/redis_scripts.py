@@ -0,0 +1,55 @@
+# Scripts Lua executados no servidor Redis: cada um roda de forma atômica
+# e custa uma única ida e volta na rede.
+
+# Atualiza o ranking de faturamento no mesmo script do crédito.
+# KEYS[3] = ranking geral, KEYS[4] (opcional) = ranking do dia;
+# ARGV[4] = valor em centavos, ARGV[5] = motorista, ARGV[6] = validade do
+# ranking do dia em segundos.
+_ATUALIZAR_RANKING = """
+    for i = 3, #KEYS do
+        redis.call('ZINCRBY', KEYS[i], ARGV[4], ARGV[5])
+        if i > 3 then
+            redis.call('EXPIRE', KEYS[i], ARGV[6])
+        end
+    end
+"""
+
+# KEYS[1] = marcador da corrida processada, KEYS[2] = saldo do motorista
+# ARGV[1] = valor da corrida, ARGV[2] = validade do marcador em segundos
+# Retorna o novo saldo, ou nil se a corrida já tinha sido creditada.
+CREDITAR_SALDO = """
+if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[2]) then
+    local saldo = redis.call('INCRBYFLOAT', KEYS[2], ARGV[1])
+""" + _ATUALIZAR_RANKING + """
+    return saldo
+end
+return false
+"""
+
+# Mesmo contrato de CREDITAR_SALDO, para o armazenamento em hash:
+# KEYS[2] = bucket "saldos:{n}", ARGV[1] = valor em centavos inteiros,
+# ARGV[3] = campo do motorista. Retorna o novo saldo em centavos.
+CREDITAR_SALDO_CENTAVOS = """
+if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[2]) then
+    local saldo = redis.call('HINCRBY', KEYS[2], ARGV[3], ARGV[1])
+""" + _ATUALIZAR_RANKING + """
+    return saldo
+end
+return false
+"""
+
+# Grava uma resposta no cache limitando a quantidade de entradas.
+# KEYS[1] = entrada, KEYS[2] = índice (sorted set por horário de gravação)
+# ARGV[1] = valor, ARGV[2] = TTL em segundos, ARGV[3] = horário,
+# ARGV[4] = máximo de entradas. As entradas mais antigas são removidas.
+GUARDAR_CACHE = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+local excesso = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if excesso > 0 then
+    local antigas = redis.call('ZRANGE', KEYS[2], 0, excesso - 1)
+    redis.call('DEL', unpack(antigas))
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, excesso - 1)
+end
+return excesso
+"""
@@ -0,0 +1,314 @@
+# Agregados de faturamento mantidos pelo consumer a cada corrida gravada:
+# quantidade, soma, mínimo e máximo de valor_corrida por motorista e por
+# forma de pagamento, em buckets por hora e por dia.
+#
+#   python -m src.database.rollups --reconstruir
+#
+# recalcula tudo a partir da coleção "corridas" com um aggregation pipeline.
+# A reconstrução grava em uma coleção temporária e só no fim a renomeia por
+# cima de COLECAO_ROLLUPS, então as consultas nunca veem os rollups vazios.
+# Pare os consumers antes: um $inc feito durante a reconstrução vai para a
+# coleção que será substituída.
+#
+# As chaves (motorista, forma de pagamento) são normalizadas em Python por
+# normalizar_chave() e gravadas na própria corrida, em rollup_chaves; o
+# pipeline agrupa por esse campo em vez de usar $toLower, que só conhece
+# ASCII e separaria "JOÃO" de "joão".
+#
+# DELETE /corridas/{id} desconta a corrida de quantidade e soma. Mínimo e
+# máximo não têm como ser desfeitos e continuam considerando a corrida
+# removida até a próxima reconstrução.
+import os
+import asyncio
+import argparse
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import ASCENDING, DeleteOne, IndexModel, UpdateOne
+
+from src.logging_config import configurar_logging
+from src.database.saldo_layout import normalizar_motorista
+
+logger = logging.getLogger(__name__)
+
+COLECAO_ROLLUPS = os.getenv("MONGO_ROLLUPS_COLLECTION", "corridas_rollups")
+COLECAO_RECONSTRUCAO = f"{COLECAO_ROLLUPS}_reconstrucao"
+
+DIMENSOES = ("motorista", "forma_pagamento")
+
+GRANULARIDADES = ("hora", "dia")
+
+INDICES_ROLLUPS = [
+    IndexModel(
+        [
+            ("dimensao", ASCENDING),
+            ("chave", ASCENDING),
+            ("granularidade", ASCENDING),
+            ("bucket", ASCENDING),
+        ],
+        name="dimensao_chave_granularidade_bucket",
+        unique=True
+    ),
+]
+
+def truncar(data: datetime, granularidade: str) -> datetime:
+    if granularidade == "hora":
+        return data.replace(minute=0, second=0, microsecond=0)
+    return data.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def normalizar_chave(dimensao: str, valor) -> str:
+    if dimensao == "motorista":
+        return normalizar_motorista(valor)
+    return str(valor or "").lower()
+
+def chaves_rollup(corrida: dict) -> dict:
+    return {
+        "motorista": normalizar_chave("motorista", corrida["motorista"]["nome"]),
+        "forma_pagamento": normalizar_chave("forma_pagamento", corrida.get("forma_pagamento")),
+    }
+
+def _filtro_bucket(dimensao: str, chave: str, granularidade: str, bucket: datetime) -> dict:
+    return {"dimensao": dimensao, "chave": chave, "granularidade": granularidade, "bucket": bucket}
+
+def operacoes_rollup(corridas: List[dict]) -> List[UpdateOne]:
+    # Agrega o lote em memória antes: várias corridas do mesmo motorista na
+    # mesma hora viram um único $inc.
+    acumulado = {}
+    for corrida in corridas:
+        valor = corrida["valor_corrida"]
+        for dimensao, chave in chaves_rollup(corrida).items():
+            for granularidade in GRANULARIDADES:
+                bucket = truncar(corrida["data_criacao"], granularidade)
+                atual = acumulado.get((dimensao, chave, granularidade, bucket))
+                if atual is None:
+                    acumulado[(dimensao, chave, granularidade, bucket)] = [1, valor, valor, valor]
+                else:
+                    atual[0] += 1
+                    atual[1] += valor
+                    atual[2] = min(atual[2], valor)
+                    atual[3] = max(atual[3], valor)
+
+    return [
+        UpdateOne(
+            _filtro_bucket(dimensao, chave, granularidade, bucket),
+            {
+                "$inc": {"quantidade": quantidade, "soma": soma},
+                "$min": {"minimo": minimo},
+                "$max": {"maximo": maximo},
+            },
+            upsert=True
+        )
+        for (dimensao, chave, granularidade, bucket), (quantidade, soma, minimo, maximo)
+        in acumulado.items()
+    ]
+
+def operacoes_remocao(corrida: dict) -> list:
+    # Desconta uma corrida removida; o bucket que fica sem corridas é
+    # apagado para não sobrar quantidade zero (e média sem divisor).
+    valor = corrida["valor_corrida"]
+    operacoes = []
+    for dimensao, chave in chaves_rollup(corrida).items():
+        for granularidade in GRANULARIDADES:
+            filtro = _filtro_bucket(dimensao, chave, granularidade, truncar(corrida["data_criacao"], granularidade))
+            operacoes.append(UpdateOne(filtro, {"$inc": {"quantidade": -1, "soma": -valor}}))
+            operacoes.append(DeleteOne({**filtro, "quantidade": {"$lte": 0}}))
+    return operacoes
+
+async def descontar(collection, corrida: dict):
+    # Corridas gravadas antes de rollup_aplicado existir já entraram nos
+    # rollups; só as ainda pendentes (False) não têm o que descontar.
+    if corrida.get("rollup_aplicado", True) is False:
+        return
+    await collection.bulk_write(operacoes_remocao(corrida), ordered=True)
+
+def pipeline_reconstrucao(dimensao: str, granularidade: str) -> list:
+    unidade = "hour" if granularidade == "hora" else "day"
+    return [
+        {"$match": {
+            "data_criacao": {"$type": "date"},
+            "valor_corrida": {"$type": "number"},
+            f"rollup_chaves.{dimensao}": {"$type": "string"},
+        }},
+        {"$group": {
+            "_id": {
+                "chave": f"$rollup_chaves.{dimensao}",
+                "bucket": {"$dateTrunc": {"date": "$data_criacao", "unit": unidade}},
+            },
+            "quantidade": {"$sum": 1},
+            "soma": {"$sum": "$valor_corrida"},
+            "minimo": {"$min": "$valor_corrida"},
+            "maximo": {"$max": "$valor_corrida"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "dimensao": {"$literal": dimensao},
+            "chave": "$_id.chave",
+            "granularidade": {"$literal": granularidade},
+            "bucket": "$_id.bucket",
+            "quantidade": 1,
+            "soma": 1,
+            "minimo": 1,
+            "maximo": 1,
+        }},
+        {"$merge": {
+            "into": COLECAO_RECONSTRUCAO,
+            "on": ["dimensao", "chave", "granularidade", "bucket"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+async def _preencher_chaves(corridas, tamanho_lote: int = 1000) -> int:
+    # Corridas gravadas antes de rollup_chaves existir.
+    preenchidas = 0
+    operacoes = []
+    cursor = corridas.find(
+        {"rollup_chaves": {"$exists": False}},
+        {"motorista.nome": 1, "forma_pagamento": 1}
+    )
+    async for corrida in cursor:
+        operacoes.append(UpdateOne(
+            {"_id": corrida["_id"]},
+            {"$set": {"rollup_chaves": chaves_rollup(corrida)}}
+        ))
+        if len(operacoes) >= tamanho_lote:
+            await corridas.bulk_write(operacoes, ordered=False)
+            preenchidas += len(operacoes)
+            operacoes = []
+    if operacoes:
+        await corridas.bulk_write(operacoes, ordered=False)
+        preenchidas += len(operacoes)
+    return preenchidas
+
+async def reconstruir(db) -> int:
+    from src.database.indices import criar_indices
+
+    corridas = db["corridas"]
+    preenchidas = await _preencher_chaves(corridas)
+    if preenchidas:
+        logger.info(f"rollup_chaves preenchido em {preenchidas} corridas")
+    # Tudo o que está em "corridas" entra na reconstrução; corridas pendentes
+    # não podem ser somadas de novo por uma reentrega.
+    await corridas.update_many(
+        {"rollup_aplicado": {"$ne": True}},
+        {"$set": {"rollup_aplicado": True}}
+    )
+
+    await db.drop_collection(COLECAO_RECONSTRUCAO)
+    temporaria = db[COLECAO_RECONSTRUCAO]
+    await criar_indices(temporaria, INDICES_ROLLUPS)
+
+    for dimensao in DIMENSOES:
+        for granularidade in GRANULARIDADES:
+            await corridas.aggregate(
+                pipeline_reconstrucao(dimensao, granularidade),
+                allowDiskUse=True
+            ).to_list(length=None)
+            logger.info(f"Rollups reconstruídos: {dimensao}/{granularidade}")
+
+    total = await temporaria.count_documents({})
+    await temporaria.rename(COLECAO_ROLLUPS, dropTarget=True)
+    return total
+
+def _resumo(buckets: List[dict]) -> dict:
+    quantidade = sum(b["quantidade"] for b in buckets)
+    soma = round(sum(b["soma"] for b in buckets), 2)
+    return {
+        "quantidade": quantidade,
+        "soma": soma,
+        "minimo": min((b["minimo"] for b in buckets), default=None),
+        "maximo": max((b["maximo"] for b in buckets), default=None),
+        "media": round(soma / quantidade, 2) if quantidade else None,
+    }
+
+def _filtro_periodo(desde: Optional[datetime], ate: Optional[datetime]) -> dict:
+    periodo = {}
+    if desde:
+        periodo["$gte"] = desde
+    if ate:
+        periodo["$lt"] = ate
+    return {"bucket": periodo} if periodo else {}
+
+async def consultar(
+    collection,
+    dimensao: str,
+    chave: str,
+    granularidade: str,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+) -> dict:
+    chave = normalizar_chave(dimensao, chave)
+    filtro = {
+        "dimensao": dimensao,
+        "chave": chave,
+        "granularidade": granularidade,
+        **_filtro_periodo(desde, ate),
+    }
+    projecao = {"_id": 0, "dimensao": 0, "chave": 0, "granularidade": 0}
+    buckets = await collection.find(filtro, projecao).sort("bucket", ASCENDING).to_list(length=None)
+
+    for bucket in buckets:
+        bucket["soma"] = round(bucket["soma"], 2)
+        bucket["media"] = round(bucket["soma"] / bucket["quantidade"], 2)
+
+    return {
+        "dimensao": dimensao,
+        "chave": chave,
+        "granularidade": granularidade,
+        "total": _resumo(buckets),
+        "buckets": buckets,
+    }
+
+async def consultar_por_chave(
+    collection,
+    dimensao: str,
+    granularidade: str,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+) -> List[dict]:
+    pipeline = [
+        {"$match": {"dimensao": dimensao, "granularidade": granularidade, **_filtro_periodo(desde, ate)}},
+        {"$group": {
+            "_id": "$chave",
+            "quantidade": {"$sum": "$quantidade"},
+            "soma": {"$sum": "$soma"},
+            "minimo": {"$min": "$minimo"},
+            "maximo": {"$max": "$maximo"},
+        }},
+        {"$sort": {"soma": -1}},
+    ]
+    return [
+        {
+            "chave": item["_id"],
+            "quantidade": item["quantidade"],
+            "soma": round(item["soma"], 2),
+            "minimo": item["minimo"],
+            "maximo": item["maximo"],
+            "media": round(item["soma"] / item["quantidade"], 2),
+        }
+        async for item in collection.aggregate(pipeline)
+    ]
+
+async def _main():
+    from src.database.mongo_client import mongo_client
+
+    parser = argparse.ArgumentParser(description="Rollups de faturamento das corridas")
+    parser.add_argument("--reconstruir", action="store_true",
+                        help="recalcula os rollups a partir da coleção corridas")
+    args = parser.parse_args()
+
+    if not args.reconstruir:
+        parser.print_help()
+        return
+
+    db = mongo_client.get_database()
+    try:
+        total = await reconstruir(db)
+        logger.info(f"{total} documentos de rollup gravados em {COLECAO_ROLLUPS}")
+    finally:
+        mongo_client.close()
+
+if __name__ == "__main__":
+    configurar_logging("rollups")
+    asyncio.run(_main())
@@ -0,0 +1,35 @@
+import os
+import zlib
+from decimal import Decimal, ROUND_HALF_UP
+
+# SALDO_STORAGE=string: uma chave "saldo:{motorista}" por motorista com o
+# valor em reais (formato original).
+# SALDO_STORAGE=hash: centavos inteiros em hashes "saldos:{bucket}" com um
+# campo por motorista. Com poucos campos por hash o Redis usa a codificação
+# compacta (listpack), então SALDO_HASH_BUCKETS deve manter cada bucket
+# abaixo de hash-max-listpack-entries (128 por padrão).
+SALDO_STORAGE = os.getenv("SALDO_STORAGE", "string").lower()
+SALDO_HASH_BUCKETS = int(os.getenv("SALDO_HASH_BUCKETS", "4096"))
+
+PREFIXO_SALDO = "saldo:"
+PREFIXO_BUCKET = "saldos:"
+
+def usa_hash() -> bool:
+    return SALDO_STORAGE == "hash"
+
+def normalizar_motorista(motorista: str) -> str:
+    return motorista.lower()
+
+def chave_saldo(motorista: str) -> str:
+    return f"{PREFIXO_SALDO}{normalizar_motorista(motorista)}"
+
+def bucket_saldo(motorista: str) -> tuple[str, str]:
+    campo = normalizar_motorista(motorista)
+    bucket = zlib.crc32(campo.encode("utf-8")) % SALDO_HASH_BUCKETS
+    return f"{PREFIXO_BUCKET}{bucket}", campo
+
+def para_centavos(valor: float) -> int:
+    return int(Decimal(str(valor)).scaleb(2).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def de_centavos(centavos) -> float:
+    return int(centavos) / 100
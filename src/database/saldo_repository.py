@@ -0,0 +1,77 @@
+import os
+import logging
+from collections import defaultdict
+from typing import Dict, List
+
+from src.database.saldo_layout import (
+    bucket_saldo,
+    chave_saldo,
+    de_centavos,
+    para_centavos,
+    usa_hash,
+)
+
+logger = logging.getLogger(__name__)
+
+SALDO_MGET_CHUNK = int(os.getenv("SALDO_MGET_CHUNK", "1000"))
+
+# Acesso assíncrono aos saldos para os endpoints. Leituras nunca escrevem:
+# motorista sem saldo registrado tem saldo 0.
+class SaldoRepository:
+    def __init__(self, client_factory):
+        self._client_factory = client_factory
+
+    @property
+    def client(self):
+        return self._client_factory()
+
+    async def obter(self, motorista: str) -> float:
+        saldos = await self.obter_varios([motorista])
+        return saldos[motorista]
+
+    async def obter_varios(self, motoristas: List[str]) -> Dict[str, float]:
+        pipe = self.client.pipeline(transaction=False)
+
+        if usa_hash():
+            por_bucket = defaultdict(list)
+            for motorista in motoristas:
+                bucket, campo = bucket_saldo(motorista)
+                por_bucket[bucket].append((motorista, campo))
+
+            grupos = list(por_bucket.values())
+            for bucket, itens in por_bucket.items():
+                pipe.hmget(bucket, [campo for _, campo in itens])
+
+            respostas = await pipe.execute()
+            return {
+                motorista: de_centavos(valor) if valor is not None else 0.0
+                for itens, valores in zip(grupos, respostas)
+                for (motorista, _), valor in zip(itens, valores)
+            }
+
+        grupos = [
+            motoristas[inicio:inicio + SALDO_MGET_CHUNK]
+            for inicio in range(0, len(motoristas), SALDO_MGET_CHUNK)
+        ]
+        for grupo in grupos:
+            pipe.mget([chave_saldo(motorista) for motorista in grupo])
+
+        respostas = await pipe.execute()
+        return {
+            motorista: float(valor) if valor is not None else 0.0
+            for grupo, valores in zip(grupos, respostas)
+            for motorista, valor in zip(grupo, valores)
+        }
+
+    async def definir(self, motorista: str, valor: float):
+        if usa_hash():
+            bucket, campo = bucket_saldo(motorista)
+            await self.client.hset(bucket, campo, para_centavos(valor))
+        else:
+            await self.client.set(chave_saldo(motorista), str(valor))
+
+    async def inicializar(self, motorista: str) -> bool:
+        if usa_hash():
+            bucket, campo = bucket_saldo(motorista)
+            return bool(await self.client.hsetnx(bucket, campo, 0))
+        return bool(await self.client.setnx(chave_saldo(motorista), "0.0"))
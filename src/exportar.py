@@ -0,0 +1,209 @@
+# Exportação das corridas em CSV ou Parquet, usada por
+# GET /corridas/export e pela linha de comando:
+#
+#   python -m src.exportar --formato parquet --desde 2025-11-01 --ate 2025-11-02 \
+#       --saida corridas.parquet
+#
+# As corridas vêm do cursor do MongoDB em lotes (EXPORT_BATCH_SIZE), com a
+# projeção de CorridaResponse, e passageiro/motorista viram colunas
+# (passageiro_nome, motorista_nota, ...). O Parquet é escrito em row groups
+# de EXPORT_ROW_GROUP_SIZE linhas; cada row group é enviado assim que fica
+# pronto, então a memória fica limitada a um row group, não à coleção.
+import io
+import os
+import csv
+import asyncio
+import argparse
+import logging
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from src.logging_config import configurar_logging
+from src.database.corrida_repository import get_corrida_repository
+from src.serializacao import PROJECAO_CORRIDA
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "100000"))
+EXPORT_PARQUET_COMPRESSION = os.getenv("EXPORT_PARQUET_COMPRESSION", "zstd")
+
+FORMATOS = ("csv", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# "passageiro.nome" -> coluna "passageiro_nome"; id_corrida e data_criacao
+# vêm primeiro.
+CAMPOS = sorted(
+    (tuple(campo.split(".")) for campo in PROJECAO_CORRIDA if campo != "_id"),
+    key=lambda caminho: caminho[0] not in ("id_corrida", "data_criacao")
+)
+COLUNAS = ["_".join(caminho) for caminho in CAMPOS]
+
+COLUNAS_DATA = {"data_criacao"}
+COLUNAS_NUMERICAS = {"valor_corrida", "motorista_nota"}
+
+def _valor(documento: dict, caminho: tuple):
+    for parte in caminho:
+        if not isinstance(documento, dict):
+            return None
+        documento = documento.get(parte)
+    if isinstance(documento, Decimal):
+        return float(documento)
+    if hasattr(documento, "to_decimal"):  # bson.Decimal128
+        return float(documento.to_decimal())
+    return documento
+
+def achatar(corrida: dict) -> tuple:
+    return tuple(_valor(corrida, caminho) for caminho in CAMPOS)
+
+async def linhas(
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    tamanho_lote: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[List[tuple]]:
+    async for lote in get_corrida_repository().iterar_periodo(desde, ate, tamanho_lote):
+        yield [achatar(corrida) for corrida in lote]
+
+async def para_csv(lotes: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS)
+
+    async for lote in lotes:
+        escritor.writerows(
+            [valor.isoformat() if isinstance(valor, datetime) else valor for valor in linha]
+            for linha in lote
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+class _SaidaEmPartes(io.RawIOBase):
+    # Destino do ParquetWriter: acumula o que foi escrito até ser retirado
+    # e enviado.
+    def __init__(self):
+        super().__init__()
+        self._partes: List[bytes] = []
+        self._posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        parte = bytes(dados)
+        self._partes.append(parte)
+        self._posicao += len(parte)
+        return len(parte)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def retirar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+def _schema_parquet():
+    import pyarrow as pa
+
+    def tipo(coluna: str):
+        if coluna in COLUNAS_DATA:
+            return pa.timestamp("ms")
+        if coluna in COLUNAS_NUMERICAS:
+            return pa.float64()
+        return pa.string()
+
+    return pa.schema([(coluna, tipo(coluna)) for coluna in COLUNAS])
+
+def _escrever_row_group(escritor, schema, linhas_grupo: List[tuple]):
+    import pyarrow as pa
+
+    colunas = list(zip(*linhas_grupo))
+    tabela = pa.Table.from_arrays(
+        [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, schema)],
+        schema=schema
+    )
+    escritor.write_table(tabela, row_group_size=len(linhas_grupo))
+
+async def para_parquet(
+    lotes: AsyncIterator[List[tuple]],
+    linhas_por_grupo: int = EXPORT_ROW_GROUP_SIZE
+) -> AsyncIterator[bytes]:
+    # pyarrow só é importado aqui: a API não paga o import para exportar CSV.
+    import pyarrow.parquet as pq
+
+    schema = _schema_parquet()
+    saida = _SaidaEmPartes()
+    escritor = pq.ParquetWriter(saida, schema, compression=EXPORT_PARQUET_COMPRESSION)
+    pendentes: List[tuple] = []
+
+    try:
+        async for lote in lotes:
+            pendentes.extend(lote)
+            while len(pendentes) >= linhas_por_grupo:
+                grupo = pendentes[:linhas_por_grupo]
+                del pendentes[:linhas_por_grupo]
+                # Montar e comprimir o row group é CPU; sai do event loop.
+                await asyncio.to_thread(_escrever_row_group, escritor, schema, grupo)
+                yield saida.retirar()
+
+        if pendentes:
+            await asyncio.to_thread(_escrever_row_group, escritor, schema, pendentes)
+    finally:
+        escritor.close()
+
+    yield saida.retirar()
+
+def exportar(
+    formato: str,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+) -> AsyncIterator[bytes]:
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato}")
+    lotes = linhas(desde, ate)
+    return para_csv(lotes) if formato == "csv" else para_parquet(lotes)
+
+def nome_arquivo(formato: str, desde: Optional[datetime], ate: Optional[datetime]) -> str:
+    partes = ["corridas"]
+    if desde is not None:
+        partes.append(desde.strftime("%Y%m%d"))
+    if ate is not None:
+        partes.append(ate.strftime("%Y%m%d"))
+    return f"{'-'.join(partes)}.{formato}"
+
+async def _main():
+    from src.database.mongo_client import mongo_client
+
+    parser = argparse.ArgumentParser(description="Exporta as corridas em CSV ou Parquet")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--desde", type=datetime.fromisoformat,
+                        help="data_criacao mínima (inclusiva), ex. 2025-11-01")
+    parser.add_argument("--ate", type=datetime.fromisoformat,
+                        help="data_criacao máxima (exclusiva), ex. 2025-11-02")
+    parser.add_argument("--saida", type=Path,
+                        help="arquivo de destino (padrão: corridas-<desde>-<ate>.<formato>)")
+    args = parser.parse_args()
+
+    saida = args.saida or Path(nome_arquivo(args.formato, args.desde, args.ate))
+    total = 0
+    try:
+        with saida.open("wb") as arquivo:
+            async for parte in exportar(args.formato, args.desde, args.ate):
+                arquivo.write(parte)
+                total += len(parte)
+        logger.info(f"{total} bytes exportados para {saida}")
+    finally:
+        mongo_client.close()
+
+if __name__ == "__main__":
+    configurar_logging("exportar")
+    asyncio.run(_main())
@@ -0,0 +1,125 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+HEALTH_INTERVAL_SECONDS = float(os.getenv("HEALTH_INTERVAL_SECONDS", "5"))
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("HEALTH_TIMEOUT_SECONDS", "2"))
+HEALTH_MAX_AGE_SECONDS = float(os.getenv("HEALTH_MAX_AGE_SECONDS", "30"))
+
+Verificacao = Callable[[], Awaitable[object]]
+
+# Verifica as dependências em segundo plano: a cada intervalo todas as
+# verificações rodam em paralelo, cada uma com timeout próprio, e o
+# resultado fica guardado com o instante da rodada. /health e
+# /health/ready só leem esse resultado, sem ida aos bancos por requisição.
+class MonitorSaude:
+    def __init__(
+        self,
+        verificacoes: Dict[str, Verificacao],
+        criticos: Optional[Iterable[str]] = None,
+        intervalo: float = HEALTH_INTERVAL_SECONDS,
+        timeout: float = HEALTH_TIMEOUT_SECONDS,
+        idade_maxima: float = HEALTH_MAX_AGE_SECONDS
+    ):
+        self.verificacoes = verificacoes
+        self.criticos = set(verificacoes if criticos is None else criticos)
+        self.intervalo = intervalo
+        self.timeout = timeout
+        self.idade_maxima = idade_maxima
+        self._servicos: Dict[str, str] = {}
+        self._latencias: Dict[str, float] = {}
+        self._verificado_em: Optional[datetime] = None
+        self._instante: Optional[float] = None
+        self._tarefa: Optional[asyncio.Task] = None
+
+    async def _verificar(self, verificacao: Verificacao) -> tuple:
+        inicio = time.perf_counter()
+        try:
+            await asyncio.wait_for(verificacao(), self.timeout)
+            estado = "healthy"
+        except asyncio.TimeoutError:
+            estado = f"unhealthy: sem resposta em {self.timeout:g}s"
+        except Exception as e:
+            estado = f"unhealthy: {str(e)}"
+        return estado, round(1000 * (time.perf_counter() - inicio), 3)
+
+    async def verificar(self):
+        nomes = list(self.verificacoes)
+        resultados = await asyncio.gather(
+            *(self._verificar(self.verificacoes[nome]) for nome in nomes)
+        )
+
+        anteriores = self._servicos
+        self._servicos = {nome: estado for nome, (estado, _) in zip(nomes, resultados)}
+        self._latencias = {nome: latencia for nome, (_, latencia) in zip(nomes, resultados)}
+        self._verificado_em = datetime.now()
+        self._instante = time.monotonic()
+
+        for nome, estado in self._servicos.items():
+            if estado != anteriores.get(nome, "healthy"):
+                logger.warning(f"Saúde de {nome}: {estado}")
+
+    async def _executar(self):
+        while True:
+            try:
+                await self.verificar()
+            except Exception as e:
+                logger.error(f"Erro ao verificar saúde das dependências: {e}")
+            await asyncio.sleep(self.intervalo)
+
+    def iniciar(self):
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    @property
+    def ativo(self) -> bool:
+        return self._tarefa is not None and not self._tarefa.done()
+
+    def idade(self) -> Optional[float]:
+        if self._instante is None:
+            return None
+        return time.monotonic() - self._instante
+
+    def estado(self) -> dict:
+        # "healthy" só com uma rodada recente em que todos responderam.
+        idade = self.idade()
+        if idade is None:
+            situacao = "starting"
+        elif idade > self.idade_maxima:
+            situacao = "stale"
+        elif all(estado == "healthy" for estado in self._servicos.values()):
+            situacao = "healthy"
+        else:
+            situacao = "degraded"
+
+        return {
+            "status": situacao,
+            "timestamp": self._verificado_em.isoformat() if self._verificado_em else None,
+            "idade_s": round(idade, 3) if idade is not None else None,
+            "services": self._servicos,
+            "latencia_ms": self._latencias,
+        }
+
+    def pronto(self) -> bool:
+        # Pronto para receber tráfego: rodada recente e dependências
+        # críticas saudáveis.
+        idade = self.idade()
+        if idade is None or idade > self.idade_maxima:
+            return False
+        return all(
+            self._servicos.get(nome) == "healthy" for nome in self.criticos
+        )
@@ -0,0 +1,105 @@
+import os
+import time
+import base64
+import threading
+from datetime import datetime
+from typing import List, Tuple
+
+# IDs de corrida ordenáveis pelo tempo, no estilo ULID: 48 bits com os
+# milissegundos desde a época seguidos de 72 bits aleatórios, em base32
+# Crockford (24 caracteres). O alfabeto está em ordem ASCII, então a ordem
+# das strings é a ordem de criação, e inserções novas caem sempre no fim
+# do índice id_corrida em vez de espalhadas pela árvore.
+#
+# Dentro do mesmo milissegundo o gerador incrementa a parte aleatória, o
+# que mantém os IDs de um processo estritamente crescentes mesmo se o
+# relógio voltar. Processos diferentes (workers do uvicorn, instâncias) só
+# colidem se sortearem os mesmos 72 bits no mesmo milissegundo.
+#
+# data_criacao é derivada do mesmo instante do ID, então ordenar por
+# (data_criacao, id_corrida) ou só por id_corrida dá a mesma sequência.
+
+_BASE32 = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+_CROCKFORD = b"0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_PARA_CROCKFORD = bytes.maketrans(_BASE32, _CROCKFORD)
+_DE_CROCKFORD = bytes.maketrans(_CROCKFORD, _BASE32)
+
+BITS_ALEATORIOS = 72
+_MAXIMO_ALEATORIO = (1 << BITS_ALEATORIOS) - 1
+TAMANHO_ID = 24
+
+class GeradorIds:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._ultimo_ms = -1
+        self._aleatorio = 0
+
+    def _apos_fork(self):
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _proximo(self) -> Tuple[int, int]:
+        ms = time.time_ns() // 1_000_000
+        if ms > self._ultimo_ms:
+            self._ultimo_ms = ms
+            self._aleatorio = int.from_bytes(os.urandom(9), "big")
+        elif self._aleatorio < _MAXIMO_ALEATORIO:
+            self._aleatorio += 1
+        else:
+            # 2^72 IDs no mesmo milissegundo: avança o relógio lógico.
+            self._ultimo_ms += 1
+            self._aleatorio = int.from_bytes(os.urandom(9), "big") >> 1
+        return self._ultimo_ms, self._aleatorio
+
+    def novo(self) -> Tuple[str, datetime]:
+        with self._lock:
+            ms, aleatorio = self._proximo()
+        return _codificar(ms, aleatorio), _instante(ms)
+
+    def varios(self, quantidade: int) -> Tuple[List[str], datetime]:
+        # IDs consecutivos que compartilham o instante do primeiro, para
+        # lotes gravados com uma única data_criacao.
+        with self._lock:
+            ms, aleatorio = self._proximo()
+            if quantidade <= 0:
+                return [], _instante(ms)
+            ids = [_codificar(ms, aleatorio)]
+            for _ in range(quantidade - 1):
+                if aleatorio >= _MAXIMO_ALEATORIO:
+                    break
+                aleatorio += 1
+                ids.append(_codificar(ms, aleatorio))
+            self._aleatorio = aleatorio
+        while len(ids) < quantidade:
+            ids.append(self.novo()[0])
+        return ids, _instante(ms)
+
+def _codificar(ms: int, aleatorio: int) -> str:
+    valor = (ms << BITS_ALEATORIOS) | aleatorio
+    return base64.b32encode(valor.to_bytes(15, "big")).translate(_PARA_CROCKFORD).decode("ascii")
+
+def _instante(ms: int) -> datetime:
+    # Mesmo relógio de datetime.now(), sem fuso, como o restante da API.
+    return datetime.fromtimestamp(ms / 1000)
+
+def instante_do_id(id_corrida: str) -> datetime:
+    if len(id_corrida) != TAMANHO_ID:
+        raise ValueError(f"ID fora do formato ordenável: {id_corrida}")
+    bruto = base64.b32decode(id_corrida.upper().encode("ascii").translate(_DE_CROCKFORD))
+    return _instante(int.from_bytes(bruto[:6], "big"))
+
+gerador_ids = GeradorIds()
+
+# Um processo filho herda o último milissegundo e a parte aleatória do pai;
+# sem reiniciar, pai e filho gerariam a mesma sequência.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=gerador_ids._apos_fork)
+
+def nova_corrida_id() -> Tuple[str, datetime]:
+    return gerador_ids.novo()
+
+def novas_corridas_ids(quantidade: int) -> Tuple[List[str], datetime]:
+    return gerador_ids.varios(quantidade)
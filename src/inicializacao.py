@@ -0,0 +1,42 @@
+import time
+import importlib
+from typing import Awaitable, Dict, TypeVar
+
+# Tempos da inicialização da API, em segundos. Este módulo é o primeiro
+# importado por src.main: importar_dependencias() carrega os drivers um a
+# um para medir o custo de cada import, e medir() cronometra as conexões
+# feitas no lifespan. O resumo vai para o log e para a métrica
+# transflow_startup_duration_seconds.
+
+_INICIO = time.perf_counter()
+
+DRIVERS = {
+    "fastapi": "fastapi",
+    "mongodb": "motor.motor_asyncio",
+    "redis": "redis.asyncio",
+    "rabbitmq": "faststream.rabbit",
+    "prometheus": "prometheus_client",
+}
+
+tempos: Dict[str, float] = {}
+
+T = TypeVar("T")
+
+def importar_dependencias():
+    for nome, modulo in DRIVERS.items():
+        inicio = time.perf_counter()
+        importlib.import_module(modulo)
+        tempos[f"importacao_{nome}"] = time.perf_counter() - inicio
+
+def fim_importacao():
+    tempos["importacao_total"] = time.perf_counter() - _INICIO
+
+async def medir(etapa: str, aguardavel: Awaitable[T]) -> T:
+    inicio = time.perf_counter()
+    try:
+        return await aguardavel
+    finally:
+        tempos[etapa] = time.perf_counter() - inicio
+
+def resumo_ms() -> Dict[str, float]:
+    return {etapa: round(1000 * segundos, 3) for etapa, segundos in tempos.items()}
@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Configuração única de logging da API e do consumer.
+#
+# Os registros entram em uma fila em memória e um QueueListener, em outra
+# thread, formata e escreve no stdout; o event loop só paga o enfileiramento.
+# Registros com extra={"evento": ...} podem ser amostrados: com
+# LOG_SAMPLE_<EVENTO>=N só 1 de cada N é emitido (com "amostragem": N no
+# JSON). WARNING e acima nunca são amostrados.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_DEFAULT = int(os.getenv("LOG_SAMPLE_DEFAULT", "1"))
+
+# Loggers de terceiros cujos registros recebem um evento para poderem ser
+# amostrados como os da aplicação.
+EVENTOS_POR_LOGGER = {
+    "uvicorn.access": "http_acesso",
+}
+
+_ATRIBUTOS_PADRAO = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "evento", "amostragem", "taskName"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+class FiltroAmostragem(logging.Filter):
+    def __init__(self):
+        super().__init__()
+        self._taxas: Dict[str, int] = {}
+        self._contadores: Dict[str, int] = {}
+
+    def _taxa(self, evento: str) -> int:
+        taxa = self._taxas.get(evento)
+        if taxa is None:
+            valor = os.getenv(f"LOG_SAMPLE_{evento.upper()}")
+            taxa = self._taxas[evento] = max(1, int(valor) if valor else LOG_SAMPLE_DEFAULT)
+        return taxa
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        evento = getattr(record, "evento", None) or EVENTOS_POR_LOGGER.get(record.name)
+        if evento is None:
+            return True
+
+        taxa = self._taxa(evento)
+        if taxa == 1:
+            return True
+
+        contador = self._contadores.get(evento, 0)
+        self._contadores[evento] = contador + 1
+        if contador % taxa:
+            return False
+
+        record.evento = evento
+        record.amostragem = taxa
+        return True
+
+class FilaNaoBloqueante(QueueHandler):
+    # O QueueHandler padrão formata a mensagem em prepare(), ainda na thread
+    # do event loop; aqui o registro segue intacto e é formatado pelo
+    # listener. Com a fila cheia o registro é descartado em vez de bloquear.
+    def __init__(self, fila: queue.Queue):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+class FormatadorJSON(logging.Formatter):
+    def __init__(self, servico: str):
+        super().__init__()
+        self.servico = servico
+
+    def format(self, record: logging.LogRecord) -> str:
+        registro = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "nivel": record.levelname,
+            "servico": self.servico,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+
+        evento = getattr(record, "evento", None)
+        if evento:
+            registro["evento"] = evento
+        amostragem = getattr(record, "amostragem", None)
+        if amostragem:
+            registro["amostragem"] = amostragem
+
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                registro[chave] = valor
+
+        if record.exc_info:
+            registro["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+def _formatador(servico: str) -> logging.Formatter:
+    if LOG_FORMAT == "json":
+        return FormatadorJSON(servico)
+    return logging.Formatter(f"%(asctime)s %(levelname)s [{servico}] %(name)s: %(message)s")
+
+def configurar_logging(servico: str):
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    saida = logging.StreamHandler(sys.stdout)
+    saida.setFormatter(_formatador(servico))
+
+    fila = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = _handler = FilaNaoBloqueante(fila)
+    handler.addFilter(FiltroAmostragem())
+
+    raiz = logging.getLogger()
+    raiz.handlers[:] = [handler]
+    raiz.setLevel(LOG_LEVEL)
+
+    # O uvicorn configura os próprios handlers antes de importar a aplicação.
+    for nome in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger = logging.getLogger(nome)
+        if logger.handlers:
+            logger.handlers[:] = [handler]
+
+    _listener = QueueListener(fila, saida)
+    _listener.start()
+    atexit.register(parar_logging)
+
+def _apos_fork():
+    # O fork só copia a thread que o chamou: o filho (worker do gunicorn com
+    # --preload) herda um listener sem thread e uma fila cujo lock pode ter
+    # ficado preso. Sem recriar os dois, nada do filho chega ao stdout.
+    global _listener
+    if _listener is None:
+        return
+    fila = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler.queue = fila
+    _listener = QueueListener(fila, *_listener.handlers)
+    _listener.start()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+def parar_logging():
+    # Esvazia a fila antes de o processo terminar.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,46 +1,157 @@
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
-from typing import List
-import uuid
-from datetime import datetime
+# Antes dos demais imports, para o tempo de import de cada driver ser
+# atribuído a ele e não ao primeiro módulo que o usa.
+from src import inicializacao
+
+inicializacao.importar_dependencias()
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import os
+import asyncio
+from datetime import date, datetime
 import logging
 
-from src.models.corrida_model import CorridaCreate, CorridaResponse
-from src.database.mongo_client import get_corridas_collection
-from src.producer import get_producer
-
-logging.basicConfig(level=logging.INFO)
+from src.models.corrida_model import CorridaCreate, CorridaDetalhe, CorridaResponse
+from src.models.corrida_lote import LoteExcedido, LoteInvalido, validar_lote_corridas
+from src.models.saldo_model import ConsultaSaldos
+from src.database.mongo_client import mongo_client, get_corridas_collection
+from src.database.indices import criar_indices, criar_indices_corridas
+from src.database import rollups
+from src.database import ranking
+from src.database.corrida_repository import get_corrida_repository
+from src.database.paginacao import CursorInvalido, decodificar_cursor
+from src.database.redis_client import close_async_redis_client, get_async_redis_client
+from src.database.saldo_repository import SaldoRepository
+from src import metrics
+from src.logging_config import configurar_logging
+from src.cache import CacheCorridas, CacheCorridasRecentes
+from src.serializacao import corridas_json, corridas_ndjson
+from src.producer import ProdutorSobrecarregado, get_producer, producer
+from src.outbox import get_outbox
+from src.ids import nova_corrida_id, novas_corridas_ids
+from src.health import MonitorSaude
+from src import exportar
+
+configurar_logging("api")
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="TransFlow",
-    description=(
-        "Gerenciamento de corridas urbanas com MongoDB, Redis "
-        "e mensageria assíncrona via RabbitMQ."
-    ),
-    version="1.0.0"
+LIMITE_PADRAO = int(os.getenv("CORRIDAS_LIMITE_PADRAO", "100"))
+LIMITE_MAXIMO = int(os.getenv("CORRIDAS_LIMITE_MAXIMO", "1000"))
+HEADER_PROXIMO_CURSOR = "X-Next-Cursor"
+MEDIA_TYPE_NDJSON = "application/x-ndjson"
+LOTE_MAXIMO_CORRIDAS = int(os.getenv("CORRIDAS_LOTE_MAXIMO", "10000"))
+# Teto do corpo de POST /corridas/batch, verificado antes de ler e validar.
+LOTE_MAXIMO_BYTES = int(os.getenv("CORRIDAS_LOTE_MAXIMO_BYTES", str(LOTE_MAXIMO_CORRIDAS * 1024)))
+CORRIDAS_POR_MENSAGEM = int(os.getenv("CORRIDAS_POR_MENSAGEM", "500"))
+
+cache_corridas = CacheCorridas(get_async_redis_client)
+corridas_recentes = CacheCorridasRecentes(get_async_redis_client)
+saldo_repository = SaldoRepository(get_async_redis_client)
+
+# Com o outbox as corridas esperam no SQLite enquanto o RabbitMQ estiver
+# fora, então ele não tira a API do balanceador.
+monitor_saude = MonitorSaude(
+    {
+        "mongodb": mongo_client.ping,
+        "redis": lambda: get_async_redis_client().ping(),
+        "rabbitmq": producer.verificar,
+    },
+    criticos=("mongodb", "redis") if get_outbox() is not None else None
 )
 
-@app.on_event("startup")
+SALDOS_EXEMPLO = ("Carla", "Carlos")
+
+async def inicializar_saldos_exemplo():
+    for motorista in SALDOS_EXEMPLO:
+        await saldo_repository.inicializar(motorista)
+
+async def _conectar_rabbitmq():
+    if get_outbox() is None:
+        await get_producer()
+        return
+    try:
+        await get_producer()
+    except Exception as e:
+        logger.warning("RabbitMQ indisponível, o outbox publicará depois: %s", e, extra={"evento": "inicializacao"})
+
 async def startup_event():
+    # Roda em cada worker, depois do fork: os clientes são criados aqui, no
+    # processo que vai usá-los, e os três backends conectam em paralelo.
     logger.info("Inicializando TransFlow")
+    inicio = asyncio.get_running_loop().time()
 
     try:
-        await get_producer()
-        inicializar_saldos_exemplo()
-        logger.info("TransFlow iniciada com sucesso")
+        await asyncio.gather(
+            inicializacao.medir("conexao_mongodb", mongo_client.ping()),
+            inicializacao.medir("conexao_redis", get_async_redis_client().ping()),
+            inicializacao.medir("conexao_rabbitmq", _conectar_rabbitmq()),
+        )
+        await inicializacao.medir("indices", asyncio.gather(
+            criar_indices_corridas(get_corridas_collection()),
+            criar_indices(
+                mongo_client.get_collection(rollups.COLECAO_ROLLUPS), rollups.INDICES_ROLLUPS
+            ),
+        ))
+
+        outbox = get_outbox()
+        if outbox is not None:
+            await outbox.iniciar()
+
+        await inicializar_saldos_exemplo()
+        monitor_saude.iniciar()
     except Exception as e:
-        logger.error(f"Erro ao iniciar serviços: {e}")
+        logger.error("Erro ao iniciar serviços: %s", e, extra={"evento": "inicializacao"})
         raise
 
-@app.on_event("shutdown")
+    inicializacao.tempos["inicializacao_total"] = asyncio.get_running_loop().time() - inicio
+    for etapa, segundos in inicializacao.tempos.items():
+        metrics.INICIALIZACAO.labels(etapa).set(segundos)
+    logger.info(
+        "TransFlow iniciada com sucesso (pid %d)", os.getpid(),
+        extra={"evento": "inicializacao", "tempos_ms": inicializacao.resumo_ms()}
+    )
+
 async def shutdown_event():
     logger.info("Encerrando TransFlow")
+
+    await monitor_saude.parar()
+
+    outbox = get_outbox()
+    if outbox is not None:
+        try:
+            await outbox.parar()
+        except Exception as e:
+            logger.error("Erro ao encerrar outbox: %s", e, extra={"evento": "encerramento"})
+
     try:
-        producer = await get_producer()
         await producer.close()
     except Exception as e:
-        logger.error(f"Erro ao encerrar producer: {e}")
+        logger.error("Erro ao encerrar producer: %s", e, extra={"evento": "encerramento"})
+
+    mongo_client.close()
+    await close_async_redis_client()
+    metrics.encerrar_processo()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup_event()
+    try:
+        yield
+    finally:
+        await shutdown_event()
+
+app = FastAPI(
+    title="TransFlow",
+    description=(
+        "Gerenciamento de corridas urbanas com MongoDB, Redis "
+        "e mensageria assíncrona via RabbitMQ."
+    ),
+    version="1.0.0",
+    lifespan=lifespan
+)
+app.add_middleware(metrics.MetricasHTTP)
 
 @app.get("/", tags=["Health"])
 async def root():
@@ -54,42 +165,41 @@ async def root():
         }
     }
 
+# As rotas de saúde só leem o último resultado do monitor_saude, que
+# verifica as dependências em segundo plano.
 @app.get("/health", tags=["Health"])
 async def health_check():
-    health_status = {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "services": {}
-    }
-
-    try:
-        collection = get_corridas_collection()
-        collection.find_one()
-        health_status["services"]["mongodb"] = "healthy"
-    except Exception as e:
-        health_status["services"]["mongodb"] = f"unhealthy: {str(e)}"
-        health_status["status"] = "degraded"
-
-    try:
-        redis_client.get_client().ping()
-        health_status["services"]["redis"] = "healthy"
-    except Exception as e:
-        health_status["services"]["redis"] = f"unhealthy: {str(e)}"
-        health_status["status"] = "degraded"
+    health_status = monitor_saude.estado()
+    status_code = 200 if health_status["status"] == "healthy" else 503
+    return JSONResponse(content=health_status, status_code=status_code)
 
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    # Não depende dos bancos: só falha se o monitor parou de rodar.
+    if not monitor_saude.ativo:
+        return JSONResponse(content={"status": "dead"}, status_code=503)
+    return {"status": "alive"}
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    health_status = monitor_saude.estado()
+    pronto = monitor_saude.pronto()
+    health_status["status"] = "ready" if pronto else "not_ready"
+    return JSONResponse(content=health_status, status_code=200 if pronto else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def exportar_metricas():
+    return Response(content=metrics.exportar(), media_type=metrics.CONTENT_TYPE)
+
+async def _guardar_recentes(corridas: List[dict]):
+    # Falhar aqui não desfaz a publicação; a corrida só deixa de ser
+    # consultável por id até o consumer gravá-la.
+    if not corridas_recentes.habilitado or not corridas:
+        return
     try:
-        producer = await get_producer()
-        if producer.broker and getattr(producer.broker, "_connection", None):
-            health_status["services"]["rabbitmq"] = "healthy"
-        else:
-            health_status["services"]["rabbitmq"] = "unhealthy: not connected"
-            health_status["status"] = "degraded"
+        await corridas_recentes.guardar(corridas)
     except Exception as e:
-        health_status["services"]["rabbitmq"] = f"unhealthy: {str(e)}"
-        health_status["status"] = "degraded"
-
-    status_code = 200 if health_status["status"] == "healthy" else 503
-    return JSONResponse(content=health_status, status_code=status_code)
+        logger.warning("Erro ao guardar corridas recentes: %s", e, extra={"evento": "corridas_recentes"})
 
 @app.post(
     "/corridas",
@@ -99,84 +209,471 @@ async def health_check():
 )
 async def cadastrar_corrida(corrida: CorridaCreate):
     try:
-        id_corrida = str(uuid.uuid4())[:8]
-        data_criacao = datetime.now()
+        id_corrida, data_criacao = nova_corrida_id()
 
         corrida_data = corrida.model_dump()
         corrida_data["id_corrida"] = id_corrida
         corrida_data["data_criacao"] = data_criacao
 
-        producer = await get_producer()
-        await producer.publicar_corrida_finalizada(corrida_data)
+        outbox = get_outbox()
+        if outbox is not None:
+            await outbox.registrar(corrida_data)
+        else:
+            producer = await get_producer()
+            await producer.publicar_corrida_finalizada(corrida_data)
+
+        await _guardar_recentes([corrida_data])
 
         logger.info(
-            f"Corrida {id_corrida} cadastrada - "
-            f"Motorista: {corrida.motorista.nome} - "
-            f"Valor: R$ {float(corrida.valor_corrida):.2f}"
+            "Corrida %s cadastrada - Motorista: %s - Valor: R$ %.2f",
+            id_corrida, corrida.motorista.nome, corrida.valor_corrida,
+            extra={"evento": "corrida_cadastrada", "id_corrida": id_corrida}
         )
 
         return CorridaResponse(**corrida_data)
 
+    except ProdutorSobrecarregado as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Serviço sobrecarregado, tente novamente: {str(e)}",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
-        logger.error(f"Erro ao cadastrar corrida: {e}")
+        logger.error("Erro ao cadastrar corrida: %s", e, extra={"evento": "corrida_cadastrada"})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao cadastrar corrida: {str(e)}"
         )
 
+def _lote_excedido(detalhe: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=detalhe
+    )
+
+async def _ler_corpo_lote(request: Request) -> bytes:
+    # Recusa pelo Content-Length sem ler nada; sem ele (chunked), para de ler
+    # assim que o corpo passa do teto.
+    excedido = f"O corpo do lote aceita no máximo {LOTE_MAXIMO_BYTES} bytes"
+    tamanho = request.headers.get("content-length", "")
+    if tamanho.isdigit() and int(tamanho) > LOTE_MAXIMO_BYTES:
+        raise _lote_excedido(excedido)
+
+    partes = []
+    lidos = 0
+    async for parte in request.stream():
+        lidos += len(parte)
+        if lidos > LOTE_MAXIMO_BYTES:
+            raise _lote_excedido(excedido)
+        partes.append(parte)
+    return b"".join(partes)
+
+@app.post("/corridas/batch", tags=["Corridas"])
+async def cadastrar_corridas_lote(request: Request):
+    try:
+        corpo = await _ler_corpo_lote(request)
+        ndjson = MEDIA_TYPE_NDJSON in request.headers.get("content-type", "")
+
+        try:
+            corridas, erros = validar_lote_corridas(corpo, ndjson=ndjson, maximo=LOTE_MAXIMO_CORRIDAS)
+        except LoteExcedido as e:
+            raise _lote_excedido(str(e))
+        except LoteInvalido as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        if len(corridas) > LOTE_MAXIMO_CORRIDAS:
+            raise _lote_excedido(f"O lote aceita no máximo {LOTE_MAXIMO_CORRIDAS} corridas")
+
+        ids, data_criacao = novas_corridas_ids(sum(1 for corrida in corridas if corrida is not None))
+        proximos_ids = iter(ids)
+        resultados = []
+        aceitas = []
+        for indice, corrida in enumerate(corridas):
+            if corrida is None:
+                resultados.append({"indice": indice, "erros": erros[indice]})
+                continue
+
+            corrida_data = corrida.model_dump()
+            corrida_data["id_corrida"] = next(proximos_ids)
+            corrida_data["data_criacao"] = data_criacao
+            aceitas.append((indice, corrida_data))
+            resultados.append({"indice": indice, "id_corrida": corrida_data["id_corrida"]})
+
+        if aceitas:
+            outbox = get_outbox()
+            if outbox is not None:
+                falhas = await outbox.registrar_varios([dados for _, dados in aceitas])
+            else:
+                producer = await get_producer()
+                falhas = await producer.publicar_lote_corridas(
+                    [dados for _, dados in aceitas], CORRIDAS_POR_MENSAGEM
+                )
+
+            publicadas = []
+            for (indice, dados), falha in zip(aceitas, falhas):
+                if falha is not None:
+                    resultados[indice] = {
+                        "indice": indice,
+                        "erros": [{"campo": "", "mensagem": f"Falha ao publicar: {falha}", "tipo": "publicacao"}]
+                    }
+                else:
+                    publicadas.append(dados)
+
+            await _guardar_recentes(publicadas)
+
+        total_aceitas = sum(1 for resultado in resultados if "id_corrida" in resultado)
+        logger.info(
+            "Lote recebido: %d corridas aceitas, %d rejeitadas",
+            total_aceitas, len(resultados) - total_aceitas,
+            extra={"evento": "lote_recebido"}
+        )
+
+        return {
+            "aceitas": total_aceitas,
+            "rejeitadas": len(resultados) - total_aceitas,
+            "resultados": resultados
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Erro ao cadastrar lote de corridas: %s", e, extra={"evento": "lote_recebido"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao cadastrar lote de corridas: {str(e)}"
+        )
+
+async def _linhas_ndjson(lotes):
+    async for lote in lotes:
+        yield corridas_ndjson(lote)
+
+def _aceita_ndjson(request: Request) -> bool:
+    return MEDIA_TYPE_NDJSON in request.headers.get("accept", "")
+
+def _resposta_pagina(corpo: bytes, proximo_cursor: Optional[str]) -> Response:
+    headers = {HEADER_PROXIMO_CURSOR: proximo_cursor} if proximo_cursor else None
+    return Response(content=corpo, media_type="application/json", headers=headers)
+
+async def _pagina_corridas(consulta: str, buscar) -> Response:
+    versao = None
+    if cache_corridas.habilitado:
+        try:
+            em_cache, versao = await cache_corridas.obter(consulta)
+            if em_cache is not None:
+                logger.info("Corridas servidas do cache (%s)", consulta, extra={"evento": "corridas_cache"})
+                return _resposta_pagina(*em_cache)
+        except Exception as e:
+            logger.warning("Cache de corridas indisponível: %s", e, extra={"evento": "corridas_cache"})
+
+    corridas, proximo_cursor = await buscar()
+    corpo = corridas_json(corridas)
+    logger.info(
+        "%d corridas retornadas (%s)", len(corridas), consulta,
+        extra={"evento": "corridas_listadas"}
+    )
+
+    if versao is not None:
+        try:
+            await cache_corridas.guardar(consulta, versao, corpo, proximo_cursor)
+        except Exception as e:
+            logger.warning("Erro ao gravar cache de corridas: %s", e, extra={"evento": "corridas_cache"})
+
+    return _resposta_pagina(corpo, proximo_cursor)
+
+def _validar_cursor(after: Optional[str]):
+    if after is None:
+        return
+    try:
+        decodificar_cursor(after)
+    except CursorInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @app.get(
     "/corridas",
     response_model=List[CorridaResponse],
     tags=["Corridas"]
 )
-async def listar_corridas():
+async def listar_corridas(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO),
+    after: Optional[str] = None
+):
     try:
-        collection = get_corridas_collection()
-        corridas = list(collection.find({}, {"_id": 0}))
+        _validar_cursor(after)
+        repository = get_corrida_repository()
+
+        if _aceita_ndjson(request):
+            logger.info("Transmitindo corridas em NDJSON", extra={"evento": "corridas_ndjson"})
+            return StreamingResponse(
+                _linhas_ndjson(repository.iterar(limite=limit, after=after)),
+                media_type=MEDIA_TYPE_NDJSON
+            )
 
-        logger.info(f"Listando {len(corridas)} corridas")
-        return corridas
+        limite = limit or LIMITE_PADRAO
+        return await _pagina_corridas(
+            f"listar|{limite}|{after or ''}",
+            lambda: repository.listar(limite, after)
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Erro ao listar corridas: {e}")
+        logger.error("Erro ao listar corridas: %s", e, extra={"evento": "corridas_listadas"})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao listar corridas: {str(e)}"
         )
 
+# Declarada antes de /corridas/{forma_pagamento}, que também casaria com
+# /corridas/export.
+@app.get("/corridas/export", tags=["Corridas"])
+async def exportar_corridas(
+    formato: str = Query("csv", pattern="^(csv|parquet)$"),
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+):
+    logger.info(
+        "Exportando corridas em %s (%s a %s)", formato, desde, ate,
+        extra={"evento": "corridas_exportadas"}
+    )
+    nome = exportar.nome_arquivo(formato, desde, ate)
+    return StreamingResponse(
+        exportar.exportar(formato, desde, ate),
+        media_type=exportar.MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'}
+    )
+
+@app.get(
+    "/corridas/id/{id_corrida}",
+    response_model=CorridaDetalhe,
+    tags=["Corridas"]
+)
+async def buscar_corrida(id_corrida: str):
+    try:
+        corrida = await get_corrida_repository().buscar_por_id(id_corrida)
+        if corrida is not None:
+            return {**corrida, "status": "persistida"}
+
+        if corridas_recentes.habilitado:
+            try:
+                corrida = await corridas_recentes.obter(id_corrida)
+            except Exception as e:
+                logger.warning("Corridas recentes indisponíveis: %s", e, extra={"evento": "corridas_recentes"})
+            if corrida is not None:
+                return {**corrida, "status": "pendente"}
+
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Corrida {id_corrida} não encontrada"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Erro ao buscar corrida: %s", e, extra={"evento": "corrida_buscada"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar corrida: {str(e)}"
+        )
+
 @app.get(
     "/corridas/{forma_pagamento}",
     response_model=List[CorridaResponse],
     tags=["Corridas"]
 )
-async def filtrar_corridas_por_pagamento(forma_pagamento: str):
+async def filtrar_corridas_por_pagamento(
+    forma_pagamento: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO),
+    after: Optional[str] = None
+):
     try:
-        collection = get_corridas_collection()
-        corridas = list(
-            collection.find(
-                {"forma_pagamento": {"$regex": f"^{forma_pagamento}$", "$options": "i"}},
-                {"_id": 0}
+        _validar_cursor(after)
+        repository = get_corrida_repository()
+
+        if _aceita_ndjson(request):
+            logger.info(
+                "Transmitindo corridas com pagamento '%s' em NDJSON", forma_pagamento,
+                extra={"evento": "corridas_ndjson"}
+            )
+            return StreamingResponse(
+                _linhas_ndjson(
+                    repository.iterar(forma_pagamento=forma_pagamento, limite=limit, after=after)
+                ),
+                media_type=MEDIA_TYPE_NDJSON
             )
-        )
 
-        logger.info(
-            f"{len(corridas)} corridas com pagamento '{forma_pagamento}' retornadas"
+        limite = limit or LIMITE_PADRAO
+        return await _pagina_corridas(
+            f"pagamento|{forma_pagamento.lower()}|{limite}|{after or ''}",
+            lambda: repository.filtrar_por_pagamento(forma_pagamento, limite, after)
         )
-        return corridas
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Erro ao filtrar corridas: {e}")
+        logger.error("Erro ao filtrar corridas: %s", e, extra={"evento": "corridas_listadas"})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao filtrar corridas: {str(e)}"
         )
 
+def _validar_granularidade(granularidade: str):
+    if granularidade not in rollups.GRANULARIDADES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Granularidade deve ser uma de: {', '.join(rollups.GRANULARIDADES)}"
+        )
+
+@app.get("/estatisticas/motoristas/{motorista}", tags=["Estatísticas"])
+async def estatisticas_motorista(
+    motorista: str,
+    granularidade: str = "dia",
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+):
+    try:
+        _validar_granularidade(granularidade)
+        return await rollups.consultar(
+            mongo_client.get_collection(rollups.COLECAO_ROLLUPS),
+            "motorista", motorista, granularidade, desde, ate
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Erro ao consultar estatísticas do motorista: %s", e, extra={"evento": "estatisticas"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar estatísticas: {str(e)}"
+        )
+
+@app.get("/estatisticas/pagamentos", tags=["Estatísticas"])
+async def estatisticas_pagamentos(
+    granularidade: str = "dia",
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+):
+    try:
+        _validar_granularidade(granularidade)
+        formas = await rollups.consultar_por_chave(
+            mongo_client.get_collection(rollups.COLECAO_ROLLUPS),
+            "forma_pagamento", granularidade, desde, ate
+        )
+        return {"granularidade": granularidade, "formas_pagamento": formas}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Erro ao consultar estatísticas de pagamento: %s", e, extra={"evento": "estatisticas"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar estatísticas: {str(e)}"
+        )
+
+@app.get("/estatisticas/pagamentos/{forma_pagamento}", tags=["Estatísticas"])
+async def estatisticas_forma_pagamento(
+    forma_pagamento: str,
+    granularidade: str = "dia",
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+):
+    try:
+        _validar_granularidade(granularidade)
+        return await rollups.consultar(
+            mongo_client.get_collection(rollups.COLECAO_ROLLUPS),
+            "forma_pagamento", forma_pagamento, granularidade, desde, ate
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Erro ao consultar estatísticas de pagamento: %s", e, extra={"evento": "estatisticas"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar estatísticas: {str(e)}"
+        )
+
+@app.get("/ranking", tags=["Ranking"])
+async def ranking_motoristas(
+    top: int = Query(10, ge=1, le=1000),
+    dia: Optional[date] = None
+):
+    try:
+        motoristas = await ranking.top_motoristas(get_async_redis_client(), top, dia)
+        return {"dia": dia, "motoristas": motoristas, "moeda": "BRL"}
+
+    except Exception as e:
+        logger.error("Erro ao consultar ranking: %s", e, extra={"evento": "ranking"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar ranking: {str(e)}"
+        )
+
+@app.get("/ranking/{motorista}", tags=["Ranking"])
+async def ranking_motorista(motorista: str, dia: Optional[date] = None):
+    try:
+        posicao = await ranking.posicao_motorista(get_async_redis_client(), motorista, dia)
+        if posicao is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Motorista {motorista} não está no ranking"
+            )
+
+        return {"dia": dia, **posicao, "moeda": "BRL"}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Erro ao consultar ranking do motorista: %s", e, extra={"evento": "ranking"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar ranking: {str(e)}"
+        )
+
+@app.get("/admin/indices", tags=["Admin"])
+async def estatisticas_indices():
+    try:
+        indices = await get_corrida_repository().estatisticas_indices()
+        return {"colecao": "corridas", "indices": indices}
+
+    except Exception as e:
+        logger.error("Erro ao consultar estatísticas de índices: %s", e, extra={"evento": "indices"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar estatísticas de índices: {str(e)}"
+        )
+
+@app.get("/admin/outbox", tags=["Admin"])
+async def estado_outbox():
+    outbox = get_outbox()
+    if outbox is None:
+        return {"habilitado": False}
+
+    try:
+        return {"habilitado": True, **(await outbox.estado())}
+
+    except Exception as e:
+        logger.error("Erro ao consultar outbox: %s", e, extra={"evento": "outbox"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar outbox: {str(e)}"
+        )
+
 @app.get("/saldo/{motorista}", tags=["Saldo"])
 async def consultar_saldo(motorista: str):
     try:
-        saldo = redis_client.get_saldo(motorista)
+        saldo = await saldo_repository.obter(motorista)
 
-        logger.info(f"Saldo de {motorista}: R$ {float(saldo):.2f}")
+        logger.info(
+            "Saldo de %s: R$ %.2f", motorista, saldo, extra={"evento": "saldo_consultado"}
+        )
 
         return {
             "motorista": motorista,
@@ -185,12 +682,34 @@ async def consultar_saldo(motorista: str):
         }
 
     except Exception as e:
-        logger.error(f"Erro ao consultar saldo: {e}")
+        logger.error("Erro ao consultar saldo: %s", e, extra={"evento": "saldo_consultado"})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao consultar saldo: {str(e)}"
         )
 
+@app.post("/saldo/consulta", tags=["Saldo"])
+async def consultar_saldos(consulta: ConsultaSaldos):
+    try:
+        saldos = await saldo_repository.obter_varios(consulta.motoristas)
+
+        logger.info(
+            "Saldos consultados em lote: %d motoristas", len(saldos),
+            extra={"evento": "saldos_consultados"}
+        )
+
+        return {
+            "saldos": saldos,
+            "moeda": "BRL"
+        }
+
+    except Exception as e:
+        logger.error("Erro ao consultar saldos: %s", e, extra={"evento": "saldos_consultados"})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar saldos: {str(e)}"
+        )
+
 @app.put("/saldo/{motorista}", tags=["Saldo"])
 async def definir_saldo(motorista: str, valor: float):
     try:
@@ -200,9 +719,9 @@ async def definir_saldo(motorista: str, valor: float):
                 detail="O saldo não pode ser negativo"
             )
 
-        redis_client.set_saldo(motorista, valor)
+        await saldo_repository.definir(motorista, valor)
 
-        logger.info(f"Saldo de {motorista} definido para R$ {float(valor):.2f}")
+        logger.info("Saldo de %s definido para R$ %.2f", motorista, float(valor), extra={"evento": "saldo_definido"})
 
         return {
             "motorista": motorista,
@@ -214,7 +733,7 @@ async def definir_saldo(motorista: str, valor: float):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro ao definir saldo: {e}")
+        logger.error("Erro ao definir saldo: %s", e, extra={"evento": "saldo_definido"})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao definir saldo: {str(e)}"
@@ -223,24 +742,48 @@ async def definir_saldo(motorista: str, valor: float):
 @app.delete("/corridas/{id_corrida}", tags=["Corridas"])
 async def deletar_corrida(id_corrida: str):
     try:
-        collection = get_corridas_collection()
-        resultado = collection.delete_one({"id_corrida": id_corrida})
-
-        if resultado.deleted_count == 0:
+        deletada = await get_corrida_repository().deletar(id_corrida)
+
+        if deletada:
+            try:
+                await rollups.descontar(
+                    mongo_client.get_collection(rollups.COLECAO_ROLLUPS), deletada
+                )
+            except Exception as e:
+                logger.warning(
+                    "Erro ao descontar corrida %s dos rollups "
+                    "(rode python -m src.database.rollups --reconstruir): %s",
+                    id_corrida, e, extra={"evento": "corrida_deletada"}
+                )
+
+        if corridas_recentes.habilitado:
+            try:
+                await corridas_recentes.remover(id_corrida)
+            except Exception as e:
+                logger.warning("Erro ao remover corrida recente: %s", e, extra={"evento": "corridas_recentes"})
+
+        if not deletada:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Corrida {id_corrida} não encontrada"
             )
 
-        logger.info(f"Corrida {id_corrida} deletada com sucesso")
+        try:
+            await cache_corridas.invalidar()
+        except Exception as e:
+            logger.warning("Erro ao invalidar cache de corridas: %s", e, extra={"evento": "corridas_cache"})
+
+        logger.info("Corrida %s deletada com sucesso", id_corrida, extra={"evento": "corrida_deletada"})
 
         return {"mensagem": f"Corrida {id_corrida} deletada com sucesso"}
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro ao deletar corrida: {e}")
+        logger.error("Erro ao deletar corrida: %s", e, extra={"evento": "corrida_deletada"})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao deletar corrida: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+inicializacao.fim_importacao()
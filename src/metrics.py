@@ -0,0 +1,185 @@
+import os
+import time
+import logging
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+logger = logging.getLogger(__name__)
+
+# Métricas Prometheus da API, do producer e do consumer. Os filhos com
+# labels fixos são criados uma vez aqui; no caminho quente só se chama
+# observe()/inc() no objeto já resolvido, sem montar labels por chamada.
+#
+# Com a API em vários workers (uvicorn --workers, gunicorn), cada worker tem
+# os próprios contadores. Com PROMETHEUS_MULTIPROC_DIR definido o
+# prometheus_client grava os valores em arquivos nesse diretório e /metrics
+# agrega todos os workers, não só o que atendeu a coleta. O diretório deve
+# ser esvaziado antes de subir os workers. O consumer é um processo por
+# instância e não usa esse modo.
+MULTIPROCESSO = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+BUCKETS_LATENCIA = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+BUCKETS_LOTE = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# API
+HTTP_LATENCIA = Histogram(
+    "transflow_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota",
+    ["rota", "metodo", "status"],
+    buckets=BUCKETS_LATENCIA,
+)
+
+INICIALIZACAO = Gauge(
+    "transflow_startup_duration_seconds",
+    "Tempo de cada etapa da inicialização da API (imports e conexões)",
+    ["etapa"],
+    multiprocess_mode="max",
+)
+
+# Producer
+PUBLICACAO_LATENCIA = Histogram(
+    "transflow_producer_publish_duration_seconds",
+    "Tempo até o broker confirmar uma mensagem, incluindo a espera no buffer",
+    buckets=BUCKETS_LATENCIA,
+)
+_PUBLICACAO_FALHAS = Counter(
+    "transflow_producer_publish_failures_total",
+    "Publicações que falharam",
+    ["motivo"],
+)
+PUBLICACAO_FALHAS_SOBRECARGA = _PUBLICACAO_FALHAS.labels("buffer_cheio")
+PUBLICACAO_FALHAS_ERRO = _PUBLICACAO_FALHAS.labels("erro")
+PRODUCER_BUFFER = Gauge(
+    "transflow_producer_buffer_messages",
+    "Mensagens aguardando no buffer de publicação",
+    multiprocess_mode="livesum",
+)
+
+# Consumer
+CONSUMER_MENSAGEM_LATENCIA = Histogram(
+    "transflow_consumer_message_duration_seconds",
+    "Tempo total de tratamento de uma mensagem",
+    buckets=BUCKETS_LATENCIA,
+)
+_CONSUMER_ETAPA = Histogram(
+    "transflow_consumer_stage_duration_seconds",
+    "Tempo gasto por lote em cada banco",
+    ["etapa"],
+    buckets=BUCKETS_LATENCIA,
+)
+CONSUMER_ETAPA_MONGO = _CONSUMER_ETAPA.labels("mongo")
+CONSUMER_ETAPA_REDIS = _CONSUMER_ETAPA.labels("redis")
+CONSUMER_LOTE_TAMANHO = Histogram(
+    "transflow_consumer_batch_size",
+    "Corridas gravadas por lote",
+    buckets=BUCKETS_LOTE,
+)
+CONSUMER_ESPERA_FAIXA = Histogram(
+    "transflow_consumer_lane_wait_seconds",
+    "Espera pela faixa do motorista e pelo limite de concorrência",
+    buckets=BUCKETS_LATENCIA,
+)
+_CONSUMER_MENSAGENS = Counter(
+    "transflow_consumer_messages_total",
+    "Mensagens tratadas pelo consumer por resultado",
+    ["resultado"],
+)
+CONSUMER_MENSAGENS_OK = _CONSUMER_MENSAGENS.labels("ok")
+CONSUMER_MENSAGENS_INVALIDAS = _CONSUMER_MENSAGENS.labels("invalida")
+CONSUMER_MENSAGENS_FALHAS = _CONSUMER_MENSAGENS.labels("falha")
+CONSUMER_REENTREGAS = Counter(
+    "transflow_consumer_redeliveries_total",
+    "Mensagens recebidas com a flag redelivered do RabbitMQ",
+)
+CONSUMER_DUPLICADAS = Counter(
+    "transflow_consumer_duplicate_rides_total",
+    "Corridas já creditadas recebidas de novo (crédito ignorado)",
+)
+CONSUMER_EM_ANDAMENTO = Gauge(
+    "transflow_consumer_in_flight_messages",
+    "Mensagens em tratamento nesta instância",
+)
+CONSUMER_FAIXAS_ATIVAS = Gauge(
+    "transflow_consumer_active_lanes",
+    "Chaves (motoristas, corridas) com mensagens em andamento",
+)
+CONSUMER_LOTE_PENDENTES = Gauge(
+    "transflow_consumer_batch_pending",
+    "Corridas aguardando o próximo lote",
+)
+CONSUMER_FILA = Gauge(
+    "transflow_consumer_queue_messages",
+    "Mensagens prontas na fila do RabbitMQ",
+    ["fila"],
+)
+
+def exportar() -> bytes:
+    if MULTIPROCESSO:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro)
+    return generate_latest()
+
+def encerrar_processo():
+    # Remove os gauges "live" deste worker dos arquivos compartilhados.
+    if MULTIPROCESSO:
+        multiprocess.mark_process_dead(os.getpid())
+
+def iniciar_servidor(porta: int):
+    start_http_server(porta)
+    logger.info(f"Métricas Prometheus expostas na porta {porta}")
+
+class MetricasHTTP:
+    # Middleware ASGI puro: mede do início da requisição até o fim da
+    # resposta. A rota usada como label é o template (/saldo/{motorista}),
+    # não o caminho, para não explodir a cardinalidade.
+    def __init__(self, app):
+        self.app = app
+        self._filhos = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            chave = (scope.get("endpoint"), scope["method"], status)
+            filho = self._filhos.get(chave)
+            if filho is None:
+                filho = self._filhos[chave] = HTTP_LATENCIA.labels(
+                    _rota(scope), scope["method"], str(status)
+                )
+            filho.observe(time.perf_counter() - inicio)
+
+def _rota(scope) -> str:
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:
+        for rota in scope["app"].router.routes:
+            if getattr(rota, "endpoint", None) is endpoint:
+                return rota.path
+    return "desconhecida"
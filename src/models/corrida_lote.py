@@ -0,0 +1,90 @@
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from src.models.corrida_model import CorridaCreate
+
+class LoteInvalido(ValueError):
+    pass
+
+class LoteExcedido(LoteInvalido):
+    pass
+
+corrida_adapter = TypeAdapter(CorridaCreate)
+lista_corridas_adapter = TypeAdapter(List[CorridaCreate])
+
+def _erros_por_indice(erro: ValidationError) -> Dict[int, list]:
+    erros = defaultdict(list)
+    for detalhe in erro.errors(include_url=False, include_context=False):
+        indice, *campo = detalhe["loc"]
+        erros[indice].append({
+            "campo": ".".join(str(parte) for parte in campo),
+            "mensagem": detalhe["msg"],
+            "tipo": detalhe["type"],
+        })
+    return erros
+
+def _erros_linha(erro: ValidationError) -> list:
+    return [
+        {
+            "campo": ".".join(str(parte) for parte in detalhe["loc"]),
+            "mensagem": detalhe["msg"],
+            "tipo": detalhe["type"],
+        }
+        for detalhe in erro.errors(include_url=False, include_context=False)
+    ]
+
+def _validar_ndjson(
+    linhas: List[bytes]
+) -> Tuple[List[Optional[CorridaCreate]], Dict[int, list]]:
+    # Cada linha é validada sozinha como uma única corrida: uma linha com
+    # "{...},{...}" é um erro daquela linha, não duas corridas, e o indice
+    # de cada resultado continua sendo o da linha.
+    corridas: List[Optional[CorridaCreate]] = []
+    erros = {}
+    for indice, linha in enumerate(linhas):
+        try:
+            corridas.append(corrida_adapter.validate_json(linha))
+        except ValidationError as e:
+            corridas.append(None)
+            erros[indice] = _erros_linha(e)
+    return corridas, erros
+
+def validar_lote_corridas(
+    corpo: bytes, ndjson: bool = False, maximo: Optional[int] = None
+) -> Tuple[List[Optional[CorridaCreate]], Dict[int, list]]:
+    if ndjson:
+        linhas = [linha for linha in corpo.splitlines() if linha.strip()]
+        # No NDJSON os itens são contados antes de qualquer parse.
+        if maximo is not None and len(linhas) > maximo:
+            raise LoteExcedido(f"O lote aceita no máximo {maximo} corridas")
+        return _validar_ndjson(linhas)
+
+    # Caminho rápido: a lista inteira é validada de uma vez direto dos bytes.
+    try:
+        return list(lista_corridas_adapter.validate_json(corpo)), {}
+    except ValidationError as e:
+        detalhes = e.errors()
+        if any(detalhe["type"] == "json_invalid" for detalhe in detalhes):
+            raise LoteInvalido("Corpo não é um JSON válido")
+        if any(not detalhe["loc"] for detalhe in detalhes):
+            raise LoteInvalido("O corpo deve ser uma lista de corridas")
+        itens, erros = json.loads(corpo), _erros_por_indice(e)
+
+    # Os itens sem erro são validados juntos.
+    validos = [indice for indice in range(len(itens)) if indice not in erros]
+    try:
+        modelos = lista_corridas_adapter.validate_python([itens[i] for i in validos])
+    except ValidationError as e:
+        for posicao, detalhes in _erros_por_indice(e).items():
+            erros[validos[posicao]] = detalhes
+        validos = [indice for indice in validos if indice not in erros]
+        modelos = lista_corridas_adapter.validate_python([itens[i] for i in validos])
+
+    corridas: List[Optional[CorridaCreate]] = [None] * len(itens)
+    for indice, modelo in zip(validos, modelos):
+        corridas[indice] = modelo
+
+    return corridas, erros
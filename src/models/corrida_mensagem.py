@@ -0,0 +1,96 @@
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pydantic import Field, TypeAdapter, ValidationError
+from typing_extensions import Annotated, NotRequired, TypedDict
+
+# Decodifica as mensagens da fila de corridas finalizadas direto dos bytes:
+# o pydantic-core faz o parse do JSON e a validação em uma passada, inclusive
+# a conversão de data_criacao para datetime.
+#
+# Os TypedDicts abaixo espelham Corrida (src/models/corrida_model.py) com as
+# mesmas restrições; validar para dict evita criar três modelos por mensagem
+# e depois chamar model_dump() para gravar no MongoDB. Mantenha os dois em
+# sincronia.
+
+class PassageiroMensagem(TypedDict):
+    nome: str
+    telefone: str
+
+class MotoristaMensagem(TypedDict):
+    nome: str
+    nota: Annotated[float, Field(ge=0, le=5)]
+
+class CorridaMensagem(TypedDict):
+    id_corrida: str
+    passageiro: PassageiroMensagem
+    motorista: MotoristaMensagem
+    origem: str
+    destino: str
+    valor_corrida: Annotated[float, Field(gt=0)]
+    forma_pagamento: str
+    data_criacao: NotRequired[Optional[datetime]]
+
+class MensagemInvalida(ValueError):
+    def __init__(self, motivos: List[dict]):
+        super().__init__("; ".join(
+            f"{motivo['campo'] or 'mensagem'}: {motivo['mensagem']}" for motivo in motivos
+        ))
+        self.motivos = motivos
+
+corrida_adapter = TypeAdapter(CorridaMensagem)
+lista_corridas_adapter = TypeAdapter(List[CorridaMensagem])
+
+_ESPACOS = b" \t\r\n"
+
+def _motivos(erro: ValidationError, indice: int | None = None) -> List[dict]:
+    motivos = []
+    for detalhe in erro.errors(include_url=False, include_context=False, include_input=False):
+        motivo = {
+            "campo": ".".join(str(parte) for parte in detalhe["loc"]),
+            "mensagem": detalhe["msg"],
+            "tipo": detalhe["type"],
+        }
+        if indice is not None:
+            motivo["indice"] = indice
+        motivos.append(motivo)
+    return motivos
+
+def _para_documento(corrida: CorridaMensagem) -> dict:
+    if corrida.get("data_criacao") is None:
+        corrida["data_criacao"] = datetime.utcnow()
+    return corrida
+
+def eh_lote(corpo: bytes) -> bool:
+    # Mensagens de POST /corridas/batch são listas JSON; olha só o primeiro
+    # caractere relevante, sem copiar o corpo.
+    for byte in memoryview(corpo):
+        if byte not in _ESPACOS:
+            return byte == ord("[")
+    return False
+
+def decodificar_corrida(corpo: bytes) -> dict:
+    try:
+        return _para_documento(corrida_adapter.validate_json(corpo))
+    except ValidationError as e:
+        raise MensagemInvalida(_motivos(e))
+
+def decodificar_lote(corpo: bytes) -> Tuple[List[dict], List[dict]]:
+    # Devolve as corridas válidas e os motivos das descartadas, com o índice
+    # de cada uma na mensagem. Só um corpo que não é lista é rejeitado inteiro.
+    try:
+        return [_para_documento(corrida) for corrida in lista_corridas_adapter.validate_json(corpo)], []
+    except ValidationError as e:
+        detalhes = e.errors(include_url=False, include_context=False, include_input=False)
+        if any(detalhe["type"] == "json_invalid" or not detalhe["loc"] for detalhe in detalhes):
+            raise MensagemInvalida(_motivos(e))
+
+    corridas = []
+    motivos = []
+    for indice, item in enumerate(json.loads(corpo)):
+        try:
+            corridas.append(_para_documento(corrida_adapter.validate_python(item)))
+        except ValidationError as e:
+            motivos.extend(_motivos(e, indice))
+    return corridas, motivos
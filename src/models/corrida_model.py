@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 class Passageiro(BaseModel):
@@ -47,3 +47,7 @@ class Corrida(CorridaBase):
 
 class CorridaResponse(Corrida):
     pass
+
+class CorridaDetalhe(CorridaResponse):
+    # "pendente": aceita pela API e ainda não gravada pelo consumer.
+    status: Literal["persistida", "pendente"]
@@ -0,0 +1,15 @@
+import os
+from pydantic import BaseModel, Field
+from typing import List
+
+SALDO_CONSULTA_MAXIMO = int(os.getenv("SALDO_CONSULTA_MAXIMO", "50000"))
+
+class ConsultaSaldos(BaseModel):
+    motoristas: List[str] = Field(..., min_length=1, max_length=SALDO_CONSULTA_MAXIMO)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "motoristas": ["Carla", "Carlos"]
+            }
+        }
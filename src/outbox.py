@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from src.batching import AgrupadorLote
+from src.producer import get_producer, serializar_corrida
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_corrida TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    publicado_em REAL,
+    reservado_por TEXT,
+    reservado_ate REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_pendentes ON outbox (publicado_em, seq);
+"""
+
+# Colunas acrescentadas depois da primeira versão do schema.
+COLUNAS_RESERVA = {"reservado_por": "TEXT", "reservado_ate": "REAL"}
+
+# Outbox local em SQLite: POST /corridas grava a corrida aqui e responde sem
+# depender do RabbitMQ; um relay em segundo plano publica as pendentes na fila.
+# As gravações concorrentes são agrupadas em uma transação (um fsync por lote).
+#
+# Cada worker da API roda o próprio relay sobre o mesmo arquivo. Para que uma
+# corrida não seja publicada por dois deles, o relay reserva as linhas antes
+# de publicar (BEGIN IMMEDIATE + UPDATE reservado_por/reservado_ate); a
+# reserva vence em OUTBOX_LEASE_SECONDS, e só então as linhas de um worker
+# que caiu voltam para os outros.
+class OutboxCorridas:
+    def __init__(self):
+        self.caminho = os.getenv("OUTBOX_PATH", "data/outbox.db")
+        self.fsync_interval_ms = float(os.getenv("OUTBOX_FSYNC_INTERVAL_MS", "5"))
+        self.batch_size = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+        self.relay_interval = float(os.getenv("OUTBOX_RELAY_INTERVAL_MS", "200")) / 1000
+        self.retencao = float(os.getenv("OUTBOX_RETENCAO_SEGUNDOS", "86400"))
+        self.lease = float(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+        self._dono: Optional[str] = None
+
+        # Todas as operações no SQLite rodam na mesma thread dedicada.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._gravador: Optional[AgrupadorLote] = None
+        self._relay: Optional[asyncio.Task] = None
+        self._ultima_publicacao: Optional[float] = None
+        self._ultimo_erro: Optional[str] = None
+
+    async def _executar(self, funcao, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, funcao, *args)
+
+    def _abrir(self):
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        conexao = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=FULL")
+        conexao.executescript(SCHEMA)
+        existentes = {linha[1] for linha in conexao.execute("PRAGMA table_info(outbox)")}
+        for coluna, tipo in COLUNAS_RESERVA.items():
+            if coluna not in existentes:
+                conexao.execute(f"ALTER TABLE outbox ADD COLUMN {coluna} {tipo}")
+        self._conexao = conexao
+
+    async def iniciar(self):
+        # Roda no lifespan de cada worker, então o pid já é o do worker.
+        self._dono = f"{socket.gethostname()}:{os.getpid()}"
+        await self._executar(self._abrir)
+
+        self._gravador = AgrupadorLote(
+            self._gravar_lote,
+            self.batch_size,
+            self.fsync_interval_ms,
+            nome="lote do outbox"
+        )
+        self._gravador.iniciar()
+        self._relay = asyncio.create_task(self._executar_relay())
+
+        estado = await self.estado()
+        logger.info(
+            f"Outbox em {self.caminho} iniciado com {estado['pendentes']} corridas pendentes"
+        )
+
+    async def parar(self):
+        if self._relay is not None:
+            self._relay.cancel()
+            try:
+                await self._relay
+            except asyncio.CancelledError:
+                pass
+            self._relay = None
+
+        if self._gravador is not None:
+            await self._gravador.parar()
+            self._gravador = None
+
+        if self._conexao is not None:
+            await self._executar(self._conexao.close)
+            self._conexao = None
+        self._executor.shutdown(wait=False)
+        logger.info("Outbox encerrado")
+
+    def _gravar(self, linhas: list):
+        with self._conexao:
+            self._conexao.execute("BEGIN")
+            self._conexao.executemany(
+                "INSERT OR IGNORE INTO outbox (id_corrida, payload, criado_em) VALUES (?, ?, ?)",
+                linhas
+            )
+
+    async def _gravar_lote(self, linhas: list):
+        await self._executar(self._gravar, linhas)
+
+    async def registrar(self, corrida_data: dict):
+        payload = serializar_corrida(corrida_data)
+        await self._gravador.submeter((corrida_data["id_corrida"], payload, time.time()))
+
+    async def registrar_varios(self, corridas: list) -> list:
+        agora = time.time()
+        confirmacoes = [
+            self._gravador.enfileirar(
+                (corrida["id_corrida"], serializar_corrida(corrida), agora)
+            )
+            for corrida in corridas
+        ]
+        return await asyncio.gather(*confirmacoes, return_exceptions=True)
+
+    def _reservar(self, limite: int, agora: float) -> list:
+        # BEGIN IMMEDIATE pega o lock de escrita já no SELECT: dois relays
+        # não leem as mesmas linhas livres.
+        with self._conexao:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            pendentes = self._conexao.execute(
+                "SELECT seq, payload FROM outbox"
+                " WHERE publicado_em IS NULL AND (reservado_ate IS NULL OR reservado_ate < ?)"
+                " ORDER BY seq LIMIT ?",
+                (agora, limite)
+            ).fetchall()
+            self._conexao.executemany(
+                "UPDATE outbox SET reservado_por = ?, reservado_ate = ? WHERE seq = ?",
+                [(self._dono, agora + self.lease, seq) for seq, _ in pendentes]
+            )
+        return pendentes
+
+    def _liberar(self, seqs: List[int]):
+        with self._conexao:
+            self._conexao.execute("BEGIN")
+            self._conexao.executemany(
+                "UPDATE outbox SET reservado_por = NULL, reservado_ate = NULL"
+                " WHERE seq = ? AND reservado_por = ?",
+                [(seq, self._dono) for seq in seqs]
+            )
+
+    def _marcar_publicadas(self, seqs: List[int], agora: float):
+        with self._conexao:
+            self._conexao.execute("BEGIN")
+            self._conexao.executemany(
+                "UPDATE outbox SET publicado_em = ?, reservado_por = NULL, reservado_ate = NULL"
+                " WHERE seq = ?",
+                [(agora, seq) for seq in seqs]
+            )
+            self._conexao.execute(
+                "DELETE FROM outbox WHERE publicado_em IS NOT NULL AND publicado_em < ?",
+                (agora - self.retencao,)
+            )
+
+    async def _publicar_pendentes(self) -> int:
+        pendentes = await self._executar(self._reservar, self.batch_size, time.time())
+        if not pendentes:
+            return 0
+
+        try:
+            producer = await get_producer()
+            resultados = await asyncio.gather(
+                *(
+                    producer.publicar_mensagem(payload, producer.fila_corrida(json.loads(payload)))
+                    for _, payload in pendentes
+                ),
+                return_exceptions=True
+            )
+        except BaseException:
+            # Sem broker (get_producer falha justamente quando o outbox mais
+            # importa) ou relay cancelado: as linhas voltam na hora, sem
+            # esperar a reserva vencer.
+            await self._executar(self._liberar, [seq for seq, _ in pendentes])
+            raise
+
+        publicadas = [
+            seq for (seq, _), resultado in zip(pendentes, resultados)
+            if not isinstance(resultado, BaseException)
+        ]
+        if publicadas:
+            agora = time.time()
+            await self._executar(self._marcar_publicadas, publicadas, agora)
+            self._ultima_publicacao = agora
+
+        falhas = [
+            (seq, resultado) for (seq, _), resultado in zip(pendentes, resultados)
+            if isinstance(resultado, BaseException)
+        ]
+        if falhas:
+            await self._executar(self._liberar, [seq for seq, _ in falhas])
+            raise falhas[0][1]
+        return len(publicadas)
+
+    async def _executar_relay(self):
+        espera = self.relay_interval
+        while True:
+            try:
+                publicadas = await self._publicar_pendentes()
+                self._ultimo_erro = None
+                espera = self.relay_interval
+                if publicadas >= self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._ultimo_erro = str(e)
+                espera = min(max(espera * 2, 1.0), 30.0)
+                logger.warning(f"Relay do outbox sem broker, nova tentativa em {espera:.0f}s: {e}")
+
+            await asyncio.sleep(espera)
+
+    def _consultar_estado(self) -> tuple:
+        return self._conexao.execute(
+            "SELECT COUNT(*), MIN(criado_em) FROM outbox WHERE publicado_em IS NULL"
+        ).fetchone()
+
+    async def estado(self) -> dict:
+        pendentes, mais_antiga = await self._executar(self._consultar_estado)
+        return {
+            "pendentes": pendentes,
+            "atraso_relay_segundos": round(time.time() - mais_antiga, 3) if mais_antiga else 0.0,
+            "ultima_publicacao": self._ultima_publicacao,
+            "ultimo_erro": self._ultimo_erro,
+        }
+
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "false").lower() in ("1", "true", "yes")
+
+outbox = OutboxCorridas()
+
+def get_outbox() -> Optional[OutboxCorridas]:
+    return outbox if OUTBOX_ENABLED else None
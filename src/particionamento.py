@@ -0,0 +1,56 @@
+import os
+import hashlib
+from typing import List
+
+from faststream.rabbit import RabbitQueue
+
+# A fila finished_drives é dividida em RABBITMQ_PARTITIONS filas
+# ("finished_drives.0", "finished_drives.1", ...). O producer escolhe a
+# partição por hash consistente do nome do motorista, então todas as corridas
+# de um motorista seguem pela mesma fila, em ordem. Com 1 partição nada muda.
+RABBITMQ_PARTITIONS = int(os.getenv("RABBITMQ_PARTITIONS", "1"))
+
+def jump_hash(chave: int, particoes: int) -> int:
+    # Jump consistent hash (Lamping e Veach): ao mudar de K para K+1 partições
+    # só 1/(K+1) dos motoristas troca de fila.
+    bucket, proximo = -1, 0
+    while proximo < particoes:
+        bucket = proximo
+        chave = (chave * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        proximo = int((bucket + 1) * ((1 << 31) / ((chave >> 33) + 1)))
+    return bucket
+
+def particao_motorista(motorista: str, particoes: int = RABBITMQ_PARTITIONS) -> int:
+    if particoes <= 1:
+        return 0
+    digest = hashlib.blake2b(motorista.lower().encode("utf-8"), digest_size=8).digest()
+    return jump_hash(int.from_bytes(digest, "big"), particoes)
+
+def nome_fila(fila_base: str, particao: int, particoes: int = RABBITMQ_PARTITIONS) -> str:
+    if particoes <= 1:
+        return fila_base
+    return f"{fila_base}.{particao}"
+
+def fila_motorista(fila_base: str, motorista: str, particoes: int = RABBITMQ_PARTITIONS) -> str:
+    return nome_fila(fila_base, particao_motorista(motorista, particoes), particoes)
+
+def fila_rabbit(fila_base: str, particao: int, particoes: int = RABBITMQ_PARTITIONS) -> RabbitQueue:
+    if particoes <= 1:
+        return RabbitQueue(fila_base)
+    # Single active consumer: se mais de um consumer assinar a mesma partição,
+    # só um recebe mensagens e os outros ficam de reserva, preservando a ordem.
+    return RabbitQueue(
+        nome_fila(fila_base, particao, particoes),
+        arguments={"x-single-active-consumer": True}
+    )
+
+def particoes_do_consumidor(particoes: int = RABBITMQ_PARTITIONS) -> List[int]:
+    # CONSUMER_PARTITIONS="0,3" fixa as partições; senão cada instância
+    # CONSUMER_INDEX de CONSUMER_REPLICAS assume as partições p % REPLICAS == INDEX.
+    explicitas = os.getenv("CONSUMER_PARTITIONS", "").strip()
+    if explicitas:
+        return sorted({int(p) for p in explicitas.split(",") if p.strip()})
+
+    replicas = max(1, int(os.getenv("CONSUMER_REPLICAS", "1")))
+    indice = int(os.getenv("CONSUMER_INDEX", "0"))
+    return [p for p in range(max(1, particoes)) if p % replicas == indice]
@@ -1,17 +1,50 @@
 import os
 import json
+import time
+import asyncio
 import logging
 from datetime import datetime
 from faststream.rabbit import RabbitBroker
 
-logging.basicConfig(level=logging.INFO)
+from src import metrics
+from src.batching import AgrupadorLote
+from src.particionamento import (
+    RABBITMQ_PARTITIONS,
+    fila_motorista,
+    fila_rabbit,
+    particao_motorista,
+)
+
 logger = logging.getLogger(__name__)
 
+class ProdutorSobrecarregado(Exception):
+    pass
+
+def serializar_corrida(corrida_data: dict) -> str:
+    if "data_criacao" in corrida_data:
+        if isinstance(corrida_data["data_criacao"], datetime):
+            corrida_data["data_criacao"] = corrida_data["data_criacao"].isoformat()
+        elif corrida_data["data_criacao"]:
+            corrida_data["data_criacao"] = str(corrida_data["data_criacao"])
+
+    return json.dumps(corrida_data, ensure_ascii=False)
+
 class CorridaProducer:
     def __init__(self):
         self.broker = None
         self.queue_name = os.getenv("RABBITMQ_QUEUE", "finished_drives")
 
+        # Com PRODUCER_BATCH_SIZE > 1 as publicações passam por um buffer em
+        # memória limitado a PRODUCER_BUFFER_SIZE e são enviadas em lotes;
+        # cada chamador é liberado quando o broker confirma a sua mensagem.
+        # Até PRODUCER_BATCHES_IN_FLIGHT lotes aguardam confirmação ao mesmo
+        # tempo: o próximo lote é coletado e enviado sem esperar o anterior.
+        self.batch_size = int(os.getenv("PRODUCER_BATCH_SIZE", "1"))
+        self.flush_interval_ms = float(os.getenv("PRODUCER_FLUSH_INTERVAL_MS", "5"))
+        self.buffer_size = int(os.getenv("PRODUCER_BUFFER_SIZE", "10000"))
+        self.lotes_em_voo = int(os.getenv("PRODUCER_BATCHES_IN_FLIGHT", "4"))
+        self._agrupador: AgrupadorLote | None = None
+
     async def connect(self):
         try:
             rabbitmq_host = os.getenv("RABBITMQ_HOST", "localhost")
@@ -27,41 +60,155 @@ class CorridaProducer:
             self.broker = RabbitBroker(rabbitmq_url)
             await self.broker.connect()
 
+            # Declara as partições para nenhuma mensagem se perder antes de
+            # algum consumer assinar a fila.
+            if RABBITMQ_PARTITIONS > 1:
+                for particao in range(RABBITMQ_PARTITIONS):
+                    await self.broker.declare_queue(fila_rabbit(self.queue_name, particao))
+
             logger.info(f"Producer conectado a {rabbitmq_host}:{rabbitmq_port}")
 
+            if self.batch_size > 1 and self._agrupador is None:
+                self._agrupador = AgrupadorLote(
+                    self._publicar_lote,
+                    self.batch_size,
+                    self.flush_interval_ms,
+                    nome="lote de publicações",
+                    capacidade=self.buffer_size,
+                    lotes_simultaneos=self.lotes_em_voo
+                )
+                self._agrupador.iniciar()
+                if not metrics.MULTIPROCESSO:
+                    metrics.PRODUCER_BUFFER.set_function(self._pendentes)
+                logger.info(
+                    f"Producer em lote: até {self.batch_size} mensagens a cada "
+                    f"{self.flush_interval_ms:.0f} ms, {self.lotes_em_voo} lotes em voo, "
+                    f"buffer de {self.buffer_size}"
+                )
+
         except Exception as e:
             logger.error(f"Erro ao conectar producer: {e}")
+            self.broker = None
             raise
 
-    async def publicar_corrida_finalizada(self, corrida_data: dict):
-        try:
-            if self.broker is None:
-                await self.connect()
-
-            if "data_criacao" in corrida_data:
-                if isinstance(corrida_data["data_criacao"], datetime):
-                    corrida_data["data_criacao"] = corrida_data["data_criacao"].isoformat()
-                elif corrida_data["data_criacao"]:
-                    corrida_data["data_criacao"] = str(corrida_data["data_criacao"])
+    async def verificar(self):
+        # Só consulta o estado da conexão; a reconexão fica com o aio-pika.
+        conexao = getattr(self.broker, "_connection", None) if self.broker else None
+        if conexao is None or getattr(conexao, "is_closed", False):
+            raise ConnectionError("not connected")
 
-            message = json.dumps(corrida_data, ensure_ascii=False)
+    def _pendentes(self) -> int:
+        return self._agrupador.pendentes if self._agrupador is not None else 0
 
-            await self.broker.publish(
-                message=message,
-                queue=self.queue_name
-            )
+    def fila_corrida(self, corrida_data: dict) -> str:
+        return fila_motorista(self.queue_name, corrida_data["motorista"]["nome"])
 
-            logger.info(
-                f"Evento publicado: corrida {corrida_data.get('id_corrida')} "
-                f"- Motorista: {corrida_data.get('motorista', {}).get('nome')} "
-                f"- Valor: R$ {float(corrida_data.get('valor_corrida', 0)):.2f}"
+    async def publicar_corrida_finalizada(self, corrida_data: dict):
+        message = serializar_corrida(corrida_data)
+        await self.publicar_mensagem(message, self.fila_corrida(corrida_data))
+
+        logger.info(
+            "Evento publicado: corrida %s - Motorista: %s - Valor: R$ %.2f",
+            corrida_data.get("id_corrida"),
+            corrida_data.get("motorista", {}).get("nome"),
+            float(corrida_data.get("valor_corrida", 0)),
+            extra={"evento": "evento_publicado"}
+        )
+
+    async def publicar_lote_corridas(self, corridas: list, tamanho_mensagem: int) -> list:
+        # Cada mensagem carrega uma lista JSON com até tamanho_mensagem corridas
+        # da mesma partição, que o consumer grava com um único bulk_write.
+        # Devolve, por corrida, None ou a exceção da mensagem que falhou.
+        indices_por_particao = {}
+        for indice, corrida in enumerate(corridas):
+            particao = particao_motorista(corrida["motorista"]["nome"])
+            indices_por_particao.setdefault(particao, []).append(indice)
+
+        grupos = []
+        for particao, indices in indices_por_particao.items():
+            for inicio in range(0, len(indices), tamanho_mensagem):
+                grupos.append((particao, indices[inicio:inicio + tamanho_mensagem]))
+
+        mensagens = [
+            (
+                "[" + ",".join(serializar_corrida(corridas[indice]) for indice in indices) + "]",
+                fila_motorista(self.queue_name, corridas[indices[0]]["motorista"]["nome"])
             )
+            for _, indices in grupos
+        ]
+
+        resultados = await asyncio.gather(
+            *(self.publicar_mensagem(message, fila) for message, fila in mensagens),
+            return_exceptions=True
+        )
+
+        logger.info(
+            "Lote publicado: %d corridas em %d mensagens", len(corridas), len(mensagens),
+            extra={"evento": "lote_publicado"}
+        )
+        por_corrida = [None] * len(corridas)
+        for (_, indices), resultado in zip(grupos, resultados):
+            for indice in indices:
+                por_corrida[indice] = resultado
+        return por_corrida
+
+    async def publicar_mensagem(self, message: str, fila: str | None = None):
+        inicio = time.perf_counter()
+        try:
+            if self.broker is None:
+                await self.connect()
 
+            fila = fila or self.queue_name
+
+            if self._agrupador is not None:
+                try:
+                    confirmacao = self._agrupador.enfileirar((message, fila))
+                except asyncio.QueueFull:
+                    raise ProdutorSobrecarregado(
+                        f"Buffer de publicação cheio ({self.buffer_size} mensagens)"
+                    )
+                await confirmacao
+            else:
+                await self._publicar(message, fila)
+
+        except ProdutorSobrecarregado as e:
+            metrics.PUBLICACAO_FALHAS_SOBRECARGA.inc()
+            logger.warning("Publicação recusada: %s", e, extra={"evento": "publicacao_recusada"})
+            raise
         except Exception as e:
-            logger.error(f"Erro ao publicar evento: {e}")
+            metrics.PUBLICACAO_FALHAS_ERRO.inc()
+            logger.error("Erro ao publicar evento: %s", e, extra={"evento": "publicacao_falhou"})
             raise
 
+        metrics.PUBLICACAO_LATENCIA.observe(time.perf_counter() - inicio)
+
+    async def _publicar(self, message: str, fila: str):
+        # O canal do aio-pika usa publisher confirms: o publish só retorna
+        # depois que o RabbitMQ confirma a mensagem.
+        await self.broker.publish(
+            message=message,
+            queue=fila
+        )
+
+    async def _publicar_lote(self, mensagens: list) -> list:
+        # As publicações do lote seguem juntas pelo canal e as confirmações
+        # chegam de forma independente; falhas são devolvidas por mensagem.
+        # Enquanto este lote espera as confirmações, o agrupador já coleta e
+        # envia os seguintes (lotes_simultaneos).
+        if metrics.MULTIPROCESSO:
+            # A coleta roda em outro worker e só vê o que está nos arquivos:
+            # o buffer é gravado uma vez por lote.
+            metrics.PRODUCER_BUFFER.set(self._pendentes())
+        return await asyncio.gather(
+            *(self._publicar(message, fila) for message, fila in mensagens),
+            return_exceptions=True
+        )
+
     async def close(self):
+        if self._agrupador is not None:
+            await self._agrupador.parar()
+            self._agrupador = None
+
         if self.broker:
             await self.broker.close()
             logger.info("Producer desconectado")
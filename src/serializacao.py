@@ -0,0 +1,54 @@
+import os
+from decimal import Decimal
+from typing import Iterable, List, Type
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+
+from src.models.corrida_model import CorridaResponse
+
+# Serialização das listagens de corridas. No caminho rápido (padrão) o
+# MongoDB já devolve só os campos de CorridaResponse e os documentos vão
+# direto para o orjson, sem criar um modelo pydantic por item. Com
+# CORRIDAS_VALIDAR_RESPOSTA=true cada página passa pelo TypeAdapter, que
+# valida e normaliza os tipos como o response_model faria.
+CORRIDAS_VALIDAR_RESPOSTA = os.getenv("CORRIDAS_VALIDAR_RESPOSTA", "false").lower() in ("1", "true", "yes")
+
+def _campos(modelo: Type[BaseModel], prefixo: str = "") -> dict:
+    campos = {}
+    for nome, campo in modelo.model_fields.items():
+        anotacao = campo.annotation
+        if isinstance(anotacao, type) and issubclass(anotacao, BaseModel):
+            campos.update(_campos(anotacao, f"{prefixo}{nome}."))
+        else:
+            campos[f"{prefixo}{nome}"] = 1
+    return campos
+
+# {"_id": 0, "id_corrida": 1, "passageiro.nome": 1, ...}
+PROJECAO_CORRIDA = {"_id": 0, **_campos(CorridaResponse)}
+
+lista_corridas_adapter = TypeAdapter(List[CorridaResponse])
+
+def _padrao(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if hasattr(valor, "to_decimal"):  # bson.Decimal128
+        return float(valor.to_decimal())
+    return str(valor)
+
+def corridas_json_validado(corridas: List[dict]) -> bytes:
+    return lista_corridas_adapter.dump_json(lista_corridas_adapter.validate_python(corridas))
+
+def corridas_json_rapido(corridas: List[dict]) -> bytes:
+    return orjson.dumps(corridas, default=_padrao)
+
+def corridas_json(corridas: List[dict]) -> bytes:
+    if CORRIDAS_VALIDAR_RESPOSTA:
+        return corridas_json_validado(corridas)
+    return corridas_json_rapido(corridas)
+
+def corridas_ndjson(corridas: Iterable[dict]) -> bytes:
+    return b"".join(
+        orjson.dumps(corrida, default=_padrao, option=orjson.OPT_APPEND_NEWLINE)
+        for corrida in corridas
+    )